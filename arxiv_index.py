@@ -0,0 +1,443 @@
+"""
+Local arXiv metadata index for offline search.
+
+• ``ArxivIndex`` keeps titles, abstracts, authors, categories and dates in
+  SQLite with an FTS5 full‑text index over the text columns, so the query
+  strings ``optimize_query`` builds run locally in milliseconds instead of
+  paging the rate‑limited export API.
+• It is filled from a metadata dump (JSON lines, one paper per line as in the
+  public arXiv metadata snapshot; ``.gz`` is fine) and kept current with an
+  incremental OAI‑PMH harvest that resumes from the last harvested date – or
+  from the last resumption token if a harvest was interrupted.
+• ``optimize_arxiv.search_arxiv`` uses it when ``ARXIV_INDEX_PATH`` names a
+  non‑empty index and falls back to the live API otherwise, including for
+  queries the translation to FTS5 cannot express.
+
+    python -m arxiv_index import arxiv-metadata-oai-snapshot.json
+    python -m arxiv_index harvest --set cs
+    python -m arxiv_index search "graph neural networks since 2022"
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
+
+# SQLite file of the index; unset disables local search.
+ARXIV_INDEX_PATH: str = os.getenv("ARXIV_INDEX_PATH", "")
+ARXIV_OAI_URL: str = os.getenv("ARXIV_OAI_URL", "https://oaipmh.arxiv.org/oai")
+# Pause between OAI‑PMH pages, as arXiv asks of harvesters.
+HARVEST_DELAY: float = float(os.getenv("ARXIV_HARVEST_DELAY", "3"))
+IMPORT_BATCH = 10_000
+
+_EPOCH = date(1970, 1, 1)
+_OAI = "{http://www.openarchives.org/OAI/2.0/}"
+_ARXIV = "{http://arxiv.org/OAI/arXiv/}"
+
+_SCHEMA = """
+-- id = (days since 1970 of published) << 32 | n‑th paper of that day, so
+-- rowid order is submission‑date order: FTS5 streams "ORDER BY rowid DESC
+-- LIMIT k" and applies date windows as rowid ranges without sorting matches.
+CREATE TABLE IF NOT EXISTS papers (
+    id         INTEGER PRIMARY KEY,
+    arxiv_id   TEXT NOT NULL UNIQUE,
+    title      TEXT NOT NULL,
+    abstract   TEXT NOT NULL,
+    authors    TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    published  TEXT NOT NULL,  -- YYYY-MM-DD of v1, what arXiv calls submittedDate
+    updated    TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, authors, categories,
+    content='papers', content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, abstract, authors, categories)
+    VALUES (new.id, new.title, new.abstract, new.authors, new.categories);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.id, old.title, old.abstract, old.authors, old.categories);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.id, old.title, old.abstract, old.authors, old.categories);
+    INSERT INTO papers_fts(rowid, title, abstract, authors, categories)
+    VALUES (new.id, new.title, new.abstract, new.authors, new.categories);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_UPSERT = """
+INSERT INTO papers (id, arxiv_id, title, abstract, authors, categories, published, updated)
+VALUES (
+    (SELECT coalesce(max(id) + 1, :day) FROM papers WHERE id >= :day AND id < :day + (1 << 32)),
+    :arxiv_id, :title, :abstract, :authors, :categories, :published, :updated
+)
+ON CONFLICT(arxiv_id) DO UPDATE SET
+    title = excluded.title, abstract = excluded.abstract, authors = excluded.authors,
+    categories = excluded.categories, updated = excluded.updated
+WHERE excluded.updated >= papers.updated
+"""
+
+# optimize_query field prefixes → FTS5 columns
+_COLUMNS = {"ti": "title", "abs": "abstract", "au": "authors", "cat": "categories"}
+_FIELD_RE = re.compile(r'\b(ti|abs|au|cat|all):("[^"]*"|[^\s()]+)')
+_DATE_RE = re.compile(r"(?:\s*\bAND\s+)?submittedDate:\[(\d{8})\d{4} TO (\d{8})\d{4}\]")
+
+
+def _day(yyyymmdd: str) -> str:
+    return f"{yyyymmdd[:4]}-{yyyymmdd[4:6]}-{yyyymmdd[6:]}"
+
+
+def _day_key(day: str) -> int:
+    """Smallest ``papers.id`` of a paper published on ``day`` (YYYY-MM-DD)."""
+    return (date.fromisoformat(day) - _EPOCH).days << 32 if day else 0
+
+
+def to_fts(query: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Translate an arXiv API query into (FTS5 MATCH expression, first day, last
+    day). The expression is '' when the query only filters by date; None
+    means the query has no FTS5 equivalent (a leading NOT).
+    """
+    lo = hi = None
+    if m := _DATE_RE.search(query):
+        lo, hi = _day(m.group(1)), _day(m.group(2))
+        query = query[: m.start()] + query[m.end():]
+
+    def _field(m: re.Match) -> str:
+        value = m.group(2).strip('"').replace('"', '""')
+        column = _COLUMNS.get(m.group(1))
+        return f'{column}:"{value}"' if column else f'"{value}"'
+
+    match = _FIELD_RE.sub(_field, query)
+    # The API's binary "AND NOT" is plain NOT in FTS5.
+    match = re.sub(r"\bAND\s+NOT\b", "NOT", match).strip()
+    match = re.sub(r"^AND\b|\bAND$", "", match).strip()
+    if match.startswith("NOT"):
+        return None
+    return match, lo, hi
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _sort_value(sort) -> str:
+    return str(getattr(sort, "value", sort or "submittedDate"))
+
+
+class ArxivIndex:
+    """SQLite + FTS5 store of arXiv metadata; one connection per thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-65536")
+            self._local.conn = conn
+        return conn
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM papers").fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: Optional[str]) -> None:
+        with self._conn() as conn:
+            if value is None:
+                conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    # ── writing ────────────────────────────────────────────────────────────
+    def upsert(self, records: Iterable[dict]) -> int:
+        """Insert or update records (dicts with the ``papers`` columns) in batches."""
+        n = 0
+        records = iter(records)
+        conn = self._conn()
+        while batch := [
+            dict(r, day=_day_key(r["published"])) for r in islice(records, IMPORT_BATCH)
+        ]:
+            with conn:
+                conn.executemany(_UPSERT, batch)
+            n += len(batch)
+        return n
+
+    def bulk_load(self, records: Iterable[dict]) -> int:
+        """
+        Fill an empty index: rows go in without the FTS triggers and the
+        full‑text index is built once at the end, several times faster than
+        indexing row by row. Plain ``upsert`` if the index has data already.
+        """
+        conn = self._conn()
+        if self.count():
+            n = self.upsert(records)
+        else:
+            conn.executescript("DROP TRIGGER papers_ai; DROP TRIGGER papers_au;")
+            try:
+                n = self.upsert(records)
+                with conn:
+                    conn.execute("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')")
+            finally:
+                conn.executescript(_SCHEMA)
+        self.optimize()
+        return n
+
+    def delete(self, arxiv_ids: Iterable[str]) -> None:
+        with self._conn() as conn:
+            conn.executemany("DELETE FROM papers WHERE arxiv_id = ?", ((i,) for i in arxiv_ids))
+
+    def optimize(self) -> None:
+        """Merge the FTS5 segments; worth it after a large import."""
+        with self._conn() as conn:
+            conn.execute("INSERT INTO papers_fts(papers_fts) VALUES ('optimize')")
+
+    def import_dump(self, path: str) -> int:
+        """Load a JSON‑lines metadata dump (``.gz`` or plain)."""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as fh:
+            return self.bulk_load(_from_dump(json.loads(line)) for line in fh if line.strip())
+
+    def harvest(self, since: Optional[str] = None, set_spec: Optional[str] = None) -> int:
+        """
+        Incremental OAI‑PMH harvest. Starts from ``since`` (YYYY-MM-DD), else
+        resumes an interrupted harvest or continues from the last one's date.
+        The resumption token is saved after every page, so an interrupted
+        harvest re‑fetches at most one page.
+        """
+        import requests
+
+        started = datetime.now(timezone.utc).date().isoformat()
+        token = None if since else self.get_meta("harvest_token")
+        since = since or self.get_meta("harvest_from")
+        n = 0
+        with requests.Session() as session:
+            while True:
+                if token:
+                    params = {"verb": "ListRecords", "resumptionToken": token}
+                else:
+                    params = {"verb": "ListRecords", "metadataPrefix": "arXiv"}
+                    if since:
+                        params["from"] = since
+                    if set_spec:
+                        params["set"] = set_spec
+                resp = session.get(ARXIV_OAI_URL, params=params, timeout=120)
+                if resp.status_code == 503:
+                    time.sleep(int(resp.headers.get("Retry-After", "30")))
+                    continue
+                resp.raise_for_status()
+
+                root = ET.fromstring(resp.content)
+                error = root.find(f"{_OAI}error")
+                if error is not None:
+                    code = error.get("code")
+                    if code == "badResumptionToken" and token:
+                        token = None
+                        self.set_meta("harvest_token", None)
+                        continue
+                    if code != "noRecordsMatch":
+                        raise RuntimeError(f"OAI-PMH error {code}: {error.text}")
+                    break
+
+                records, deleted = _from_oai(root)
+                n += self.upsert(records)
+                self.delete(deleted)
+                el = root.find(f"{_OAI}ListRecords/{_OAI}resumptionToken")
+                token = (el.text or "").strip() if el is not None else ""
+                self.set_meta("harvest_token", token or None)
+                if not token:
+                    break
+                time.sleep(HARVEST_DELAY)
+        self.set_meta("harvest_from", started)
+        return n
+
+    # ── reading ────────────────────────────────────────────────────────────
+    def search(self, query: str, filters: dict) -> Optional[List[dict]]:
+        """
+        ``search_arxiv``‑shaped results for an ``optimize_query`` query string,
+        or None if the query can't be run locally.
+        """
+        parsed = to_fts(query)
+        if parsed is None:
+            return None
+        match, lo, hi = parsed
+        if min_y := filters.get("min_year"):
+            lo = max(lo or "", f"{min_y}-01-01")
+        if max_y := filters.get("max_year"):
+            hi = min(hi or "9999", f"{max_y}-12-31")
+
+        # Constrain and order by the FTS5 rowid when matching so the date window
+        # and "newest first" are pushed down instead of sorting every match.
+        if match:
+            source = "papers_fts JOIN papers p ON p.id = papers_fts.rowid"
+            key = "papers_fts.rowid"
+            where, params = ["papers_fts MATCH ?"], [match]
+        else:
+            source, key, where, params = "papers p", "p.id", [], []
+        if lo:
+            where.append(f"{key} >= ?")
+            params.append(_day_key(lo))
+        if hi:
+            where.append(f"{key} < ?")
+            params.append(_day_key(min(hi, "9999-12-30")) + (1 << 32))
+
+        sort = _sort_value(filters.get("sort"))
+        if sort == "relevance" and match:
+            # title hits weigh more than abstract hits, like the API's ranking
+            order = "bm25(papers_fts, 4.0, 1.0, 2.0, 1.0)"
+        elif sort == "lastUpdatedDate":
+            order = "p.updated DESC"
+        else:
+            order = f"{key} DESC"
+
+        sql = (
+            f"SELECT p.arxiv_id, p.title, p.authors, p.published, p.abstract FROM {source}"
+            f"{' WHERE ' + ' AND '.join(where) if where else ''}"
+            f" ORDER BY {order} LIMIT ?"
+        )
+        params.append(filters.get("max_results", 10))
+        try:
+            rows = self._conn().execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            # FTS5 syntax error: hand‑written query the translation can't express
+            return None
+        return [
+            {
+                "title": title,
+                "authors": authors,
+                "published": date.fromisoformat(published),
+                "url": f"http://arxiv.org/abs/{arxiv_id}",
+                "summary": abstract,
+            }
+            for arxiv_id, title, authors, published, abstract in rows
+        ]
+
+
+def _from_dump(rec: dict) -> dict:
+    """Metadata‑snapshot record → ``papers`` row."""
+    if parsed := rec.get("authors_parsed"):
+        authors = ", ".join(" ".join(p for p in (first, last) if p) for last, first, *_ in parsed)
+    else:
+        authors = rec.get("authors", "")
+    versions = rec.get("versions") or []
+    updated = rec.get("update_date") or ""
+    if versions and versions[0].get("created"):
+        published = parsedate_to_datetime(versions[0]["created"]).date().isoformat()
+    else:
+        published = updated
+    return {
+        "arxiv_id": rec["id"],
+        "title": _clean(rec.get("title", "")),
+        "abstract": _clean(rec.get("abstract", "")),
+        "authors": _clean(authors),
+        "categories": rec.get("categories", ""),
+        "published": published,
+        "updated": updated or published,
+    }
+
+
+def _from_oai(root: ET.Element) -> Tuple[List[dict], List[str]]:
+    """Rows and deleted IDs from one ``ListRecords`` page in the ``arXiv`` format."""
+    records, deleted = [], []
+    for rec in root.iter(f"{_OAI}record"):
+        header = rec.find(f"{_OAI}header")
+        if header is not None and header.get("status") == "deleted":
+            deleted.append(header.findtext(f"{_OAI}identifier", "").rsplit(":", 1)[-1])
+            continue
+        meta = rec.find(f"{_OAI}metadata/{_ARXIV}arXiv")
+        if meta is None:
+            continue
+        authors = [
+            " ".join(
+                p for p in (a.findtext(f"{_ARXIV}forenames"), a.findtext(f"{_ARXIV}keyname")) if p
+            )
+            for a in meta.iter(f"{_ARXIV}author")
+        ]
+        published = meta.findtext(f"{_ARXIV}created", "")
+        records.append({
+            "arxiv_id": meta.findtext(f"{_ARXIV}id", ""),
+            "title": _clean(meta.findtext(f"{_ARXIV}title", "")),
+            "abstract": _clean(meta.findtext(f"{_ARXIV}abstract", "")),
+            "authors": _clean(", ".join(authors)),
+            "categories": meta.findtext(f"{_ARXIV}categories", ""),
+            "published": published,
+            "updated": meta.findtext(f"{_ARXIV}updated", "") or published,
+        })
+    return records, deleted
+
+
+_index: Optional[ArxivIndex] = None
+
+
+def get_index() -> Optional[ArxivIndex]:
+    """The index at ``ARXIV_INDEX_PATH``; None if unset, missing or still empty."""
+    global _index
+    if not ARXIV_INDEX_PATH or not os.path.exists(ARXIV_INDEX_PATH):
+        return None
+    if _index is None:
+        _index = ArxivIndex(ARXIV_INDEX_PATH)
+    return _index if _index.count() else None
+
+
+def _main():
+    ap = argparse.ArgumentParser(prog="python -m arxiv_index")
+    ap.add_argument("--db", default=ARXIV_INDEX_PATH or "arxiv_index.sqlite")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("import", help="load a JSON-lines metadata dump").add_argument("dump")
+    harvest = sub.add_parser("harvest", help="incremental OAI-PMH harvest")
+    harvest.add_argument("--from", dest="since", help="YYYY-MM-DD; default: last harvest")
+    harvest.add_argument("--set", dest="set_spec", help="OAI set, e.g. cs or physics:hep-th")
+    sub.add_parser("search", help="run a prompt through optimize_query").add_argument("prompt")
+    sub.add_parser("stats")
+    args = ap.parse_args()
+
+    index = ArxivIndex(args.db)
+    t0 = time.perf_counter()
+    if args.cmd == "import":
+        n = index.import_dump(args.dump)
+        print(f"imported {n} records in {time.perf_counter() - t0:.1f} s")
+    elif args.cmd == "harvest":
+        n = index.harvest(args.since, args.set_spec)
+        print(f"harvested {n} records in {time.perf_counter() - t0:.1f} s")
+    elif args.cmd == "search":
+        from optimize_arxiv import optimize_query
+
+        query, filters = optimize_query(args.prompt)
+        print(query)
+        for paper in index.search(query, filters) or []:
+            print(f"{paper['published']}  {paper['url']}  {paper['title']}")
+        print(f"{(time.perf_counter() - t0) * 1000:.1f} ms")
+    else:
+        print(f"papers: {index.count()}")
+        print(f"last harvest: {index.get_meta('harvest_from') or 'never'}")
+        if token := index.get_meta("harvest_token"):
+            print(f"interrupted harvest, resumption token: {token}")
+
+
+if __name__ == "__main__":
+    _main()
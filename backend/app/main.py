@@ -1,12 +1,40 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import uuid, os, json, redis
+import uuid, os, json, re, time, hashlib, redis
+import redis.asyncio as aioredis
 
-from backend.workers.tasks import run_limitation, run_future_work
+from backend.pipeline import metrics
+from backend.workers.tasks import (
+    INFLIGHT_TTL,
+    JOB_TTL,
+    job_key,
+    result_key,
+    load_result,
+    unpack_result,
+    inflight_key,
+    release_claim,
+    events_channel,
+    tokens_stream,
+    run_limitation,
+    run_batch,
+    run_future_work,
+    run_future_followup,
+    limitation_context,
+    queue_depths,
+)
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 r = redis.from_url(REDIS_URL, decode_responses=True)
+ar = aioredis.from_url(REDIS_URL, decode_responses=True)
+arb = aioredis.from_url(REDIS_URL)  # bytes client for compressed results
+
+TERMINAL_STATUSES = {"DONE", "ERROR"}
+KEEPALIVE_SECONDS = 15
+BATCH_MAX_TOPICS = int(os.getenv("BATCH_MAX_TOPICS", "50"))
+FUTURE_MAX_PAPERS = int(os.getenv("FUTURE_MAX_PAPERS", "20"))
+EXPORT_BATCH = 200
 
 
 app = FastAPI(title="Research‑Developer API")
@@ -22,57 +50,307 @@ app.add_middleware(
 
 class PipelineIn(BaseModel):
     prompt: str
+    sections_only: bool = False
+
+
+class BatchIn(BaseModel):
+    prompts: list[str]
+    sections_only: bool = False
 
 
 class FutureIn(BaseModel):
-    pipeline_json: str
-    pdf_path: str
+    limitation_job_id: str
+    pdf_path: str | None = None
+    pdf_paths: list[str] = []  # several papers → one merged, source‑cited idea list
     choice: str | None = None
     generate_code: bool = False
 
 
+class FollowupIn(BaseModel):
+    choice: str
+    generate_code: bool = False
+
+
 class JobOut(BaseModel):
     job_id: str
     status: str
+    stage: str | None = None
     result: dict | None = None
     error: str | None = None
+    metrics: dict | None = None
+    attached: bool = False  # an identical job was already in flight
 
 
 @app.post("/jobs/pipeline", response_model=JobOut)
 def start_pipeline(body: PipelineIn):
     """Enqueue the ‘limitation’ pipeline and return a job_id."""
-    job_id = str(uuid.uuid4())
-    r.hset(job_id, mapping={"status": "QUEUED"})
-    run_limitation.delay(job_id, body.prompt)
-    return {"job_id": job_id, "status": "QUEUED", "result": None, "error": None}
+    flight = (_normalize(body.prompt), body.sections_only)
+    return _enqueue(run_limitation, body.prompt, body.sections_only, flight=flight)
+
+
+@app.post("/jobs/batch", response_model=JobOut)
+def start_batch(body: BatchIn):
+    """Enqueue one job answering many topics against a shared paper pool."""
+    prompts = list(dict.fromkeys(p.strip() for p in body.prompts if p.strip()))
+    if not prompts:
+        raise HTTPException(status_code=422, detail="No prompts given")
+    if len(prompts) > BATCH_MAX_TOPICS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_TOPICS} prompts per batch")
+
+    flight = (sorted({_normalize(p) for p in prompts}), body.sections_only)
+    return _enqueue(run_batch, prompts, body.sections_only, flight=flight)
 
 
 @app.post("/jobs/future", response_model=JobOut)
 def start_future(body: FutureIn):
-    """Enqueue the ‘future work’ pipeline and return a job_id."""
-    job_id = str(uuid.uuid4())
-    r.hset(job_id, mapping={"status": "QUEUED"})
-    run_future_work.delay(
-        job_id,
-        body.pipeline_json,
-        body.pdf_path,
+    """
+    Enqueue the ‘future work’ pipeline for one or several papers of a
+    finished limitation (or batch) job and return a job_id.
+    """
+    pdf_paths = list(dict.fromkeys(body.pdf_paths + ([body.pdf_path] if body.pdf_path else [])))
+    if not pdf_paths:
+        raise HTTPException(status_code=422, detail="No pdf_path given")
+    if len(pdf_paths) > FUTURE_MAX_PAPERS:
+        raise HTTPException(status_code=422, detail=f"At most {FUTURE_MAX_PAPERS} papers per job")
+    try:
+        context = limitation_context(body.limitation_job_id, pdf_paths)
+    except KeyError:
+        raise HTTPException(status_code=409, detail="Limitation job not found or not finished")
+    except ValueError:
+        raise HTTPException(status_code=422, detail="A pdf_path is not a paper of that job")
+
+    # Keyed on what the job will actually read, so requests from different
+    # limitation jobs that produced the same analysis also coalesce.
+    flight = (
+        hashlib.sha256(context.encode()).hexdigest(),
+        sorted(pdf_paths),
+        _normalize(body.choice or ""),
+        body.generate_code,
+    )
+    return _enqueue(
+        run_future_work,
+        body.limitation_job_id,
+        pdf_paths,
         body.choice,
         body.generate_code,
+        flight=flight,
     )
-    return {"job_id": job_id, "status": "QUEUED", "result": None, "error": None}
+
+
+@app.post("/sessions/{session_id}/continue", response_model=JobOut)
+def continue_session(session_id: str, body: FollowupIn):
+    """Enqueue a follow‑up on a warm future‑work session and return a job_id."""
+    if not r.exists(f"session:{session_id}"):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    flight = (session_id, _normalize(body.choice), body.generate_code)
+    return _enqueue(run_future_followup, session_id, body.choice, body.generate_code, flight=flight)
+
+
+@app.get("/jobs/export")
+async def export_jobs(status: str | None = None, since: float | None = None, results: bool = True):
+    """
+    Bulk export for analytics: one JSON line per job (``JobOut`` shape plus
+    ``queued_at``), optionally filtered by status (all jobs when absent or
+    empty) and enqueue time (epoch s).
+    """
+    status = status or None
+
+    async def stream():
+        keys = []
+        async for key in ar.scan_iter(match="job:*", count=1000):
+            if key.count(":") == 1:  # the status hashes, not results / token streams
+                keys.append(key)
+            if len(keys) >= EXPORT_BATCH:
+                for line in await _export_batch(keys, status, since, results):
+                    yield line
+                keys = []
+        for line in await _export_batch(keys, status, since, results):
+            yield line
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @app.get("/jobs/{job_id}", response_model=JobOut)
-def job_status(job_id: str):
-    """Poll the current status/result of a job."""
-    if not r.exists(job_id):
+def job_status(job_id: str, include_result: bool = True):
+    """
+    Poll the current status/result of a job. The result is only read (and
+    decompressed) once the job is DONE; ``include_result=false`` skips it.
+    """
+    data = r.hgetall(job_key(job_id))
+    if not data:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    done = include_result and data.get("status") == "DONE"
+    return _job_view(job_id, data, load_result(job_id) if done else None)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server‑Sent Events stream of a job: one ``JobOut``‑shaped event for the
+    current state, then one per status / stage change until DONE or ERROR.
+    """
+    if not await ar.exists(job_key(job_id)):
         raise HTTPException(status_code=404, detail="Job not found")
 
-    data = r.hgetall(job_id)
-    result = json.loads(data["result"]) if data.get("result") else None
+    async def stream():
+        pubsub = ar.pubsub()
+        await pubsub.subscribe(events_channel(job_id))
+        try:
+            # Snapshot after subscribing so no update can fall in between.
+            state = await ar.hgetall(job_key(job_id))
+            yield _sse(await _ajob_view(job_id, state))
+            while state.get("status") not in TERMINAL_STATUSES:
+                msg = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=KEEPALIVE_SECONDS
+                )
+                if msg is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                state.update(json.loads(msg["data"]))
+                yield _sse(await _ajob_view(job_id, state))
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/jobs/{job_id}/tokens")
+async def job_tokens(job_id: str, last_event_id: str | None = Header(default=None)):
+    """
+    Server‑Sent Events stream of answer tokens as the LLM generates them.
+
+    Each event is ``{"field": ..., "token": ...}`` where ``field`` names the
+    answer being written (a question, or ideas / project / code). The stream
+    is replayed from the start (or from ``Last-Event-ID`` on reconnect) and
+    ends with an ``end`` event once the job finishes.
+    """
+    if not await ar.exists(job_key(job_id)):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        key = tokens_stream(job_id)
+        cursor = last_event_id or "0"
+        while True:
+            batch = await ar.xread({key: cursor}, block=KEEPALIVE_SECONDS * 1000, count=500)
+            if not batch:
+                if (await ar.hget(job_key(job_id), "status")) in TERMINAL_STATUSES and not await ar.exists(key):
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            for cursor, entry in batch[0][1]:
+                if entry.get("event") == "end":
+                    yield f"id: {cursor}\nevent: end\ndata: {{}}\n\n"
+                    return
+                yield f"id: {cursor}\n" + _sse(entry)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Per‑stage latency histograms, event counters and queue depths (Prometheus text)."""
+    names = sorted(r.smembers(metrics.STAGES_KEY))
+    pipe = r.pipeline(transaction=False)
+    for name in names:
+        pipe.hgetall(metrics.stage_key(name))
+    stages = dict(zip(names, pipe.execute()))
+    body = metrics.render_prometheus(stages, r.hgetall(metrics.COUNTERS_KEY), queue_depths())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def _enqueue(task, *args, flight: tuple | None = None) -> dict:
+    """
+    Create the job hash, stamp the enqueue time and send ``task``.
+
+    With ``flight`` (normalised request parameters) the job first claims the
+    request's single‑flight key; if an identical job already holds it, this
+    one is dropped and the caller is attached to that job instead.
+    """
+    job_id = str(uuid.uuid4())
+    mapping = {"status": "QUEUED", "queued_at": time.time()}
+    key = inflight_key(task.name, *flight) if flight is not None else None
+    if key:
+        mapping["inflight_key"] = key
+    # The hash exists before the claim, so anyone who sees the claim can read it.
+    pipe = r.pipeline()
+    pipe.hset(job_key(job_id), mapping=mapping)
+    pipe.expire(job_key(job_id), JOB_TTL)
+    pipe.execute()
+
+    while key and not r.set(key, job_id, nx=True, ex=INFLIGHT_TTL):
+        owner = r.get(key)
+        if owner and (data := r.hgetall(job_key(owner))):
+            r.delete(job_key(job_id))
+            result = load_result(owner) if data.get("status") == "DONE" else None
+            return {**_job_view(owner, data, result), "attached": True}
+        if owner:
+            release_claim(key, owner)  # its job is gone; retry the claim
+
+    try:
+        task.delay(job_id, *args)
+    except Exception:
+        if key:
+            release_claim(key, job_id)
+        r.delete(job_key(job_id))
+        raise
+    return {"job_id": job_id, "status": "QUEUED", "result": None, "error": None}
+
+
+def _job_view(job_id: str, data: dict, result: dict | None = None) -> dict:
     return {
         "job_id": job_id,
         "status": data.get("status", "UNKNOWN"),
+        "stage": data.get("stage"),
         "result": result,
         "error": data.get("error"),
+        "metrics": json.loads(data["metrics"]) if data.get("metrics") else None,
     }
+
+
+async def _ajob_view(job_id: str, data: dict) -> dict:
+    result = None
+    if data.get("status") == "DONE":
+        result = unpack_result(await arb.get(result_key(job_id)))
+    return _job_view(job_id, data, result)
+
+
+async def _export_batch(keys: list[str], status: str | None, since: float | None, results: bool) -> list[str]:
+    pipe = ar.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    rows = [
+        (key.split(":", 1)[1], data)
+        for key, data in zip(keys, await pipe.execute())
+        if data
+        and (status is None or data.get("status") == status)
+        and (since is None or float(data.get("queued_at", 0)) >= since)
+    ]
+    blobs = [None] * len(rows)
+    if results and rows:
+        blobs = await arb.mget([result_key(job_id) for job_id, _ in rows])
+    return [
+        json.dumps(
+            {**_job_view(job_id, data, unpack_result(blob)), "queued_at": data.get("queued_at")}
+        )
+        + "\n"
+        for (job_id, data), blob in zip(rows, blobs)
+    ]
+
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
@@ -0,0 +1,147 @@
+"""
+On‑disk cache of ``docs.aquery`` answers.
+
+Answers are keyed on a fingerprint of the document set (the index‑cache keys
+of the PDFs, i.e. their content hashes), the exact question text, the model
+and the answer‑shaping settings. When the paper set has not changed, the same
+question returns the stored answer in milliseconds without touching the LLM.
+
+Entries expire after ``ANSWER_CACHE_TTL`` seconds; the directory is trimmed
+to ``ANSWER_CACHE_MAX_BYTES`` least‑recently‑used first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from paperqa import Docs, Settings
+
+from backend.pipeline import metrics
+from backend.pipeline.storage import evict_lru
+
+ANSWER_CACHE_DIR: str = os.getenv("ANSWER_CACHE_DIR", "papers/.answers")
+ANSWER_CACHE_TTL: int = int(os.getenv("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+ANSWER_CACHE_MAX_BYTES: int = int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(256 * 1024**2)))
+
+
+def fingerprint(doc_keys: list[str], question: str, settings: Settings, extra: str = "") -> str:
+    """Stable cache key for one question against one document set."""
+    payload = {
+        "docs": sorted(doc_keys),
+        "question": question,
+        "llm": settings.llm,
+        "summary_llm": settings.summary_llm,
+        "embedding": settings.embedding,
+        "temperature": settings.temperature,
+        "answer": settings.answer.model_dump(mode="json"),
+        "extra": extra,
+    }
+    raw = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class AnswerCache:
+    """TTL + size‑bounded LRU of answer strings stored as small JSON files."""
+
+    def __init__(
+        self,
+        root: str | Path = ANSWER_CACHE_DIR,
+        ttl: int = ANSWER_CACHE_TTL,
+        max_bytes: int = ANSWER_CACHE_MAX_BYTES,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            metrics.count("answer_cache_miss")
+            return None
+        if time.time() - entry["created"] > self.ttl:
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            metrics.count("answer_cache_miss")
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        metrics.count("answer_cache_hit")
+        return entry["answer"]
+
+    def put(self, key: str, answer: str) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump({"created": time.time(), "answer": answer}, fh)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        evict_lru(self.root, "*.json", self.max_bytes)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache: AnswerCache | None = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """Process‑wide cache instance shared by both runners."""
+    global _cache
+    if _cache is None:
+        _cache = AnswerCache()
+    return _cache
+
+
+async def cached_query(
+    docs: Docs,
+    question: str,
+    settings: Settings,
+    doc_keys: list[str],
+    *,
+    extra: str = "",
+    render=str,
+    on_token: Callable[[str], None] | None = None,
+) -> tuple[str, bool]:
+    """
+    ``docs.aquery`` through the answer cache.
+
+    ``render`` turns the PaperQA response into the stored string. ``on_token``
+    receives answer chunks as the LLM streams them (a cached answer arrives as
+    a single chunk). Returns (answer, came_from_cache).
+    """
+    cache = get_answer_cache()
+    key = fingerprint(doc_keys, question, settings, extra)
+    answer = cache.get(key)
+    if answer is not None:
+        if on_token:
+            on_token(answer)
+        return answer, True
+    callbacks = [on_token] if on_token else None
+    with metrics.stage("query"):
+        res = await docs.aquery(question, settings=settings, callbacks=callbacks)
+    metrics.record_answer(res)
+    answer = render(res)
+    cache.put(key, answer)
+    return answer, False
@@ -0,0 +1,142 @@
+"""
+Concurrent arXiv PDF downloader.
+
+• One pooled ``requests.Session`` shared by every download in the process.
+• Bounded thread pool, so ten papers take roughly as long as the slowest one.
+• Bodies are streamed in chunks to a temp file in the target directory and
+  atomically renamed into place – a crashed download never leaves a truncated
+  PDF behind that later jobs would treat as cached.
+• Connection errors (including bodies cut off mid‑transfer), timeouts, 429
+  and 5xx responses are retried with exponential backoff.
+
+``ARXIV_PDF_BASE`` can point at a local stub server for testing.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ARXIV_PDF_BASE: str = os.getenv("ARXIV_PDF_BASE", "https://arxiv.org/pdf")
+PAPERS_DIR: str = os.getenv("PAPERS_DIR", "papers")
+DOWNLOAD_WORKERS: int = int(os.getenv("DOWNLOAD_WORKERS", "8"))
+DOWNLOAD_RETRIES: int = int(os.getenv("DOWNLOAD_RETRIES", "3"))
+DOWNLOAD_BACKOFF: float = float(os.getenv("DOWNLOAD_BACKOFF", "0.5"))
+DOWNLOAD_TIMEOUT: float = 30.0
+
+_CHUNK = 64 * 1024
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process‑wide HTTP session with a connection pool sized for the workers."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_WORKERS)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+    return _session
+
+
+def arxiv_id_from_url(arxiv_url: str) -> str:
+    return arxiv_url.rstrip("/").split("/")[-1]
+
+
+def _fetch(url: str, dest: Path, session: requests.Session) -> None:
+    """Stream ``url`` into a temp file next to ``dest`` and rename it into place."""
+    with session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as resp:
+        resp.raise_for_status()
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in resp.iter_content(_CHUNK):
+                    fh.write(chunk)
+            os.replace(tmp, dest)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+def download_pdf(
+    arxiv_url: str,
+    dest_dir: str | Path = PAPERS_DIR,
+    *,
+    base_url: str = ARXIV_PDF_BASE,
+    retries: int = DOWNLOAD_RETRIES,
+    backoff: float = DOWNLOAD_BACKOFF,
+    session: requests.Session | None = None,
+) -> str:
+    """Download and cache to ``<dest_dir>/<arxiv_id>.pdf``; returns the path."""
+    arxiv_id = arxiv_id_from_url(arxiv_url)
+    dest = Path(dest_dir) / f"{arxiv_id}.pdf"
+    if dest.exists():
+        return str(dest)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    session = session or get_session()
+    url = f"{base_url.rstrip('/')}/{arxiv_id}.pdf"
+
+    for attempt in range(retries + 1):
+        try:
+            _fetch(url, dest, session)
+            return str(dest)
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,  # connection dropped mid‑body
+            requests.exceptions.ContentDecodingError,
+        ):
+            if attempt == retries:
+                raise
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in _RETRY_STATUS or attempt == retries:
+                raise
+        time.sleep(backoff * 2**attempt)
+    raise AssertionError("unreachable")
+
+
+def download_pdfs(
+    arxiv_urls: list[str],
+    dest_dir: str | Path = PAPERS_DIR,
+    *,
+    max_workers: int = DOWNLOAD_WORKERS,
+    on_done: Callable[[int, int], None] | None = None,
+    **kwargs,
+) -> list[str]:
+    """
+    Download many papers concurrently; result order matches ``arxiv_urls``.
+
+    ``on_done(finished, total)`` is called (from a worker thread) after each paper.
+    """
+    if not arxiv_urls:
+        return []
+    total = len(arxiv_urls)
+    finished = 0
+    lock = threading.Lock()
+
+    def _one(url: str) -> str:
+        nonlocal finished
+        path = download_pdf(url, dest_dir, **kwargs)
+        if on_done:
+            with lock:
+                finished += 1
+                on_done(finished, total)
+        return path
+
+    workers = max(1, min(max_workers, total))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-dl") as pool:
+        return list(pool.map(_one, arxiv_urls))
@@ -1,20 +1,68 @@
 """
 Turns future_work.py into an importable function.
 
-async run(json_path, pdf_path) → dict with keys:
-  ideas  : bullet‑list string
-  project: scaffold string (after user choice)
-  code   : starter code string (optional; may be "")
+async run(context_json, pdf_path) → dict with keys:
+  ideas     : bullet‑list string
+  ranked    : the same ideas parsed (idea / sources / support / size / variants,
+              see ``backend.pipeline.ideas``); only clustered for several PDFs
+  project   : scaffold string (after user choice)
+  code      : starter code string (optional; may be "")
+  cached    : True when every answer came from the answer cache
+  session_id: handle for ``continue_session`` follow‑ups on the warm Docs
+
+Given several PDFs, the ideas are map‑reduced instead: each paper's
+future‑work bullets are extracted on its own (a bounded pool of per‑paper
+queries, each cached on that paper's content alone), then merged into one
+ranked list citing its sources; ``ideas`` is then that merged list and the
+result also carries ``papers`` (each paper's own list).
 """
 
-import asyncio, json, textwrap
+import asyncio, json, os, textwrap, uuid
 from pathlib import Path
-from paperqa import Docs, Settings
+from typing import Callable
+from paperqa import Docs
+
+from backend.pipeline import metrics
+from backend.pipeline.answer_cache import cached_query, fingerprint, get_answer_cache
+from backend.pipeline.ideas import listed, merge as merge_ideas, render as render_ideas
+from backend.pipeline.index_cache import get_index_cache
+from backend.pipeline.resources import get_settings
+from backend.pipeline.sessions import Session, sessions
 
 LLM_NAME = "gpt-4.1"
+PQA_CONCURRENCY = int(os.getenv("PQA_CONCURRENCY", "4"))
+
+# Map query of the multi‑paper mode. It mentions neither the analysis context
+# nor the other papers, so a paper's answer stays cached when the set changes.
+PAPER_IDEAS_QUERY = (
+    "List the future work or open problems *explicitly mentioned* in this paper. "
+    "Return a numbered bullet list; keep each bullet under 25 words."
+)
+
+
+def _noop(stage: str) -> None:
+    pass
+
+
+def _formatted(res) -> str:
+    return getattr(res, "formatted_answer", str(res))
+
+
+def _as_list(pdf_paths: str | Path | list[str | Path]) -> list[str]:
+    if isinstance(pdf_paths, (str, Path)):
+        return [str(pdf_paths)]
+    return list(dict.fromkeys(str(p) for p in pdf_paths))
+
 
+def _field_sink(on_token: Callable[[str, str], None] | None, field: str):
+    return (lambda chunk: on_token(field, chunk)) if on_token else None
 
-async def _ideas_from_context(docs: Docs, settings: Settings, context_json: str) -> str:
+
+async def _ideas_from_context(
+    session: Session,
+    context_json: str,
+    on_token: Callable[[str, str], None] | None = None,
+) -> tuple[str, bool]:
     query = textwrap.dedent(
         f"""
         Here is an analysis snippet (JSON):\n{context_json}\n\n
@@ -22,35 +70,138 @@ async def _ideas_from_context(docs: Docs, settings: Settings, context_json: str)
         Return a numbered bullet list; keep each bullet under 25 words.
         """
     )
-    res = await docs.aquery(query, settings=settings)
-    return getattr(res, "formatted_answer", str(res))
+    return await cached_query(
+        session.docs,
+        query,
+        session.settings,
+        session.doc_keys,
+        render=_formatted,
+        on_token=_field_sink(on_token, "ideas"),
+    )
 
 
-async def run(
-    pipeline_json: str | Path,
-    pdf_path: str | Path,
-    choice: str | None = None,
-    generate_code: bool = False,
+async def _paper_ideas(pdf_path: str, settings, sem: asyncio.Semaphore) -> tuple[str, bool]:
+    """Map step: one paper's idea list; the paper is only loaded on a cache miss."""
+    cache = get_index_cache()
+    answer_cache = get_answer_cache()
+    key = fingerprint([cache.key(pdf_path, settings)], PAPER_IDEAS_QUERY, settings)
+    if (ideas := answer_cache.get(key)) is not None:
+        return ideas, True
+    async with sem:
+        docs = Docs()
+        with metrics.stage("ingest"):
+            await cache.aadd(docs, pdf_path, settings)
+        with metrics.stage("query"):
+            res = await docs.aquery(PAPER_IDEAS_QUERY, settings=settings)
+    metrics.record_answer(res)
+    # the bare answer: sources are cited per paper by the reduce step
+    ideas = getattr(res, "answer", str(res))
+    answer_cache.put(key, ideas)
+    return ideas, False
+
+
+async def extract_ideas(
+    context_json: str,
+    pdf_paths: list[str],
+    *,
+    concurrency: int = PQA_CONCURRENCY,
+    progress: Callable[[str], None] | None = None,
+    on_token: Callable[[str, str], None] | None = None,
 ) -> dict:
     """
-    Args:
-        pipeline_json: path to the pipeline_output.json produced earlier
-        pdf_path     : target PDF chosen by user
-        choice       : idea number / keyword selected by user (optional: None returns just ideas)
-        generate_code: whether to expand into starter_project.py content
+    Map‑reduce the future‑work ideas of several papers: at most
+    ``concurrency`` per‑paper extractions run at once, then the lists are
+    merged and ranked against ``context_json``.
+
+    Returns dict{ ideas, ranked, papers, cached }.
+    """
+    progress = progress or _noop
+    settings = get_settings(LLM_NAME)
+    sem = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def _one(pdf_path: str) -> tuple[str, bool]:
+        nonlocal done
+        result = await _paper_ideas(pdf_path, settings, sem)
+        done += 1
+        progress(f"extracting ideas {done}/{len(pdf_paths)}")
+        return result
+
+    progress(f"extracting ideas 0/{len(pdf_paths)}")
+    results = await asyncio.gather(*(_one(p) for p in pdf_paths))
+    papers = {Path(p).stem: ideas for p, (ideas, _) in zip(pdf_paths, results)}
+
+    with metrics.stage("merge_ideas"):
+        ranked = await merge_ideas(papers, settings, context_json)
+    ideas = render_ideas(ranked)
+    if on_token:
+        on_token("ideas", ideas)
+    return {
+        "ideas": ideas,
+        "ranked": [idea.as_dict() for idea in ranked],
+        "papers": papers,
+        "cached": all(hit for _, hit in results),
+    }
+
 
-    Returns dict{ ideas, project, code }
+async def resume_session(
+    session_id: str, pdf_paths: str | Path | list[str | Path], ideas: str = ""
+) -> Session:
     """
+    Build (or rebuild, e.g. after eviction or on another worker) the warm Docs
+    for the paper(s) in ``pdf_paths`` and register them under ``session_id``.
+    """
+    pdf_paths = _as_list(pdf_paths)
     docs = Docs()
-    await docs.aadd(str(pdf_path))
-    settings = Settings(llm=LLM_NAME)
+    settings = get_settings(LLM_NAME)
+    cache = get_index_cache()
+    for pdf_path in pdf_paths:
+        with metrics.stage("ingest"):
+            await cache.aadd(docs, pdf_path, settings)
+    session = Session(
+        session_id=session_id,
+        pdf_paths=pdf_paths,
+        docs=docs,
+        settings=settings,
+        doc_keys=[cache.key(p, settings) for p in pdf_paths],
+        ideas=ideas,
+    )
+    sessions.put(session)
+    return session
 
-    context_json = Path(pipeline_json).read_text()
-    ideas = await _ideas_from_context(docs, settings, context_json)
 
-    project = ""
-    code = ""
-    if choice:
+async def start_session(
+    context_json: str,
+    pdf_path: str | Path,
+    session_id: str | None = None,
+    progress: Callable[[str], None] | None = None,
+    on_token: Callable[[str, str], None] | None = None,
+) -> Session:
+    """Open a new session and extract the idea list once."""
+    progress = progress or _noop
+    progress("embedding")
+    session = await resume_session(session_id or str(uuid.uuid4()), pdf_path)
+    progress("querying ideas")
+    session.ideas, session.cached = await _ideas_from_context(session, context_json, on_token)
+    return session
+
+
+async def continue_session(
+    session: Session,
+    choice: str,
+    generate_code: bool = False,
+    progress: Callable[[str], None] | None = None,
+    on_token: Callable[[str, str], None] | None = None,
+    workspace: str | Path | None = None,
+) -> dict:
+    """
+    Draft the project (and optional code) for ``choice`` using the warm Docs;
+    the code is also written to ``<workspace>/starter_project.py`` if given.
+    """
+    progress = progress or _noop
+    session.cached = True
+    if choice != session.choice or not session.project:
+        progress("drafting project")
         follow_query = textwrap.dedent(
             f"""
             You chose: {choice}. Draft a concrete research framework to tackle it.
@@ -58,24 +209,101 @@ async def run(
             high‑level file‑structure / code outline if applicable. Bullet points please.
             """
         )
-        project_res = await docs.aquery(follow_query, settings=settings)
-        project = getattr(project_res, "formatted_answer", str(project_res))
+        session.project, hit = await cached_query(
+            session.docs,
+            follow_query,
+            session.settings,
+            session.doc_keys,
+            render=_formatted,
+            on_token=_field_sink(on_token, "project"),
+        )
+        session.choice = choice
+        session.cached &= hit
+        session.code = ""
 
-        if generate_code:
-            code_res = await docs.aquery(
-                "Expand the previous outline into runnable Python stubs with TODOs. "
-                "If project does not require code, return the statement project does not require code.",
-                settings=settings,
-            )
-            code = getattr(code_res, "formatted_answer", str(code_res))
-            Path("starter_project.py").write_text(code)
+    if generate_code and not session.code:
+        progress("generating code")
+        session.code, hit = await cached_query(
+            session.docs,
+            "Expand the previous outline into runnable Python stubs with TODOs. "
+            "If project does not require code, return the statement project does not require code.",
+            session.settings,
+            session.doc_keys,
+            extra=choice,
+            render=_formatted,
+            on_token=_field_sink(on_token, "code"),
+        )
+        session.cached &= hit
 
-    return {"ideas": ideas, "project": project, "code": code}
+    if workspace is not None and session.code:
+        Path(workspace, "starter_project.py").write_text(session.code)
 
+    return session.answers()
+
+
+async def run(
+    context_json: str,
+    pdf_path: str | Path | list[str | Path],
+    choice: str | None = None,
+    generate_code: bool = False,
+    session_id: str | None = None,
+    progress: Callable[[str], None] | None = None,
+    on_token: Callable[[str, str], None] | None = None,
+    workspace: str | Path | None = None,
+) -> dict:
+    """
+    Args:
+        context_json : JSON analysis from the limitation job (its answers)
+        pdf_path     : target PDF chosen by user, or a list of PDFs to map‑reduce
+        choice       : idea number / keyword selected by user (optional: None returns just ideas)
+        generate_code: whether to expand into starter code
+        session_id   : id under which the warm session is kept (generated if omitted)
+        progress     : optional callback receiving stage names as the job advances
+        on_token     : optional callback receiving (field, chunk) as answers stream
+        workspace    : directory to write starter_project.py to (none if omitted)
+
+    Returns dict{ ideas, ranked, project, code, cached, session_id } (+ papers
+    for several PDFs)
+    """
+    pdf_paths = _as_list(pdf_path)
+    if len(pdf_paths) == 1:
+        session = await start_session(context_json, pdf_paths[0], session_id, progress, on_token)
+        # one paper's list has nothing to merge: no embedding request here
+        ranked = listed({Path(pdf_paths[0]).stem: session.ideas})
+        if choice:
+            await continue_session(session, choice, generate_code, progress, on_token, workspace)
+        return {
+            **session.answers(),
+            "ranked": [idea.as_dict() for idea in ranked],
+            "session_id": session.session_id,
+        }
+
+    session_id = session_id or str(uuid.uuid4())
+    merged = await extract_ideas(context_json, pdf_paths, progress=progress, on_token=on_token)
+    result = {"ideas": merged["ideas"], "project": "", "code": "", "cached": merged["cached"]}
+    if choice:
+        # The shared Docs over all papers are only needed to draft a project;
+        # follow‑ups without a warm session rebuild them the same way.
+        (progress or _noop)("embedding")
+        session = await resume_session(session_id, pdf_paths, merged["ideas"])
+        answers = await continue_session(
+            session, choice, generate_code, progress, on_token, workspace
+        )
+        result.update(answers, cached=merged["cached"] and answers["cached"])
+    return {
+        **result,
+        "ranked": merged["ranked"],
+        "papers": merged["papers"],
+        "session_id": session_id,
+    }
 
 
 if __name__ == "__main__":
+    import sys
+
     async def _cli():
-        ideas_dict = await run("pipeline_output.json", "papers/test_future.pdf")
+        context_json = Path("pipeline_output.json").read_text()
+        pdf_paths = sys.argv[1:] or ["papers/test_future.pdf"]
+        ideas_dict = await run(context_json, pdf_paths, workspace=".")
         print(ideas_dict["ideas"])
     asyncio.run(_cli())
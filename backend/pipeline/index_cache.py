@@ -0,0 +1,154 @@
+"""
+Persistent, content‑addressed cache of parsed + embedded PaperQA documents.
+
+• Entries are keyed by a SHA‑256 of the PDF bytes plus the parsing/embedding
+  settings, so the same arXiv paper is only chunked and embedded once no matter
+  which job (or which runner) asks for it.
+• Each entry is a pickled ``(Doc, list[Text])`` pair that is replayed into a
+  ``Docs`` via ``aadd_texts`` – the texts already carry their embeddings, so a
+  hit costs a disk read instead of an embedding pass.
+• The directory is size‑bounded; least‑recently‑used entries (by mtime, which
+  is bumped on every hit) are evicted once ``max_bytes`` is exceeded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import paperqa
+from paperqa import Docs, Settings
+
+from backend.pipeline import metrics
+from backend.pipeline.sections import chunking, section_texts
+from backend.pipeline.storage import evict_lru, file_digest
+
+INDEX_CACHE_DIR: str = os.getenv("INDEX_CACHE_DIR", "papers/.index")
+INDEX_CACHE_MAX_BYTES: int = int(os.getenv("INDEX_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
+def _settings_tag(settings: Settings) -> str:
+    """
+    Short hash of the settings that change how a PDF is chunked/embedded, and
+    of the PaperQA version whose ``Doc`` / ``Text`` classes the entry pickles.
+    """
+    chunk_size, overlap = chunking(settings)
+    raw = f"{paperqa.__version__}|{settings.embedding}|{chunk_size}|{overlap}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:12]
+
+
+class IndexCache:
+    """On‑disk LRU of embedded PaperQA documents."""
+
+    def __init__(self, root: str | Path = INDEX_CACHE_DIR, max_bytes: int = INDEX_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, pdf_path: str | Path, settings: Settings, sections_only: bool = False) -> str:
+        key = f"{file_digest(pdf_path)}-{_settings_tag(settings)}"
+        return f"{key}-sections" if sections_only else key
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.pkl"
+
+    def get(self, key: str):
+        """
+        Return the cached ``(doc, texts)`` pair or ``None``. An entry that no
+        longer loads (truncated, or pickled by an incompatible PaperQA) is
+        deleted and counts as a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                entry = pickle.load(fh)
+        except Exception as e:
+            if not isinstance(e, FileNotFoundError):
+                path.unlink(missing_ok=True)
+            self.misses += 1
+            metrics.count("index_cache_miss")
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        metrics.count("index_cache_hit")
+        return entry
+
+    def put(self, key: str, doc, texts) -> None:
+        """Atomically write an entry, then trim the cache to ``max_bytes``."""
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump((doc, texts), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        evict_lru(self.root, "*.pkl", self.max_bytes)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def aload(
+        self,
+        pdf_path: str | Path,
+        settings: Settings,
+        sections_only: bool = False,
+    ) -> tuple[tuple, bool]:
+        """
+        Return ``((doc, texts), hit)`` for ``pdf_path``, parsing and embedding
+        it only on a miss.
+
+        With ``sections_only`` only the limitation / future‑work / conclusion
+        sections are embedded (whole paper if none are found).
+        """
+        key = self.key(pdf_path, settings, sections_only)
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+        scratch = Docs()
+        with metrics.stage("embed"):
+            built = section_texts(pdf_path, settings) if sections_only else None
+            if built is not None:
+                await scratch.aadd_texts(built[1], built[0], settings=settings)
+            else:
+                await scratch.aadd(str(pdf_path), settings=settings)
+        doc = next(iter(scratch.docs.values()))
+        entry = (doc, list(scratch.texts))
+        self.put(key, *entry)
+        return entry, False
+
+    async def aadd(
+        self,
+        docs: Docs,
+        pdf_path: str | Path,
+        settings: Settings,
+        sections_only: bool = False,
+    ) -> bool:
+        """
+        Add ``pdf_path`` to ``docs``, parsing and embedding it only on a miss.
+
+        Returns True on a cache hit.
+        """
+        (doc, texts), hit = await self.aload(pdf_path, settings, sections_only)
+        await docs.aadd_texts(texts, doc, settings=settings)
+        return hit
+
+
+_cache: IndexCache | None = None
+
+
+def get_index_cache() -> IndexCache:
+    """Process‑wide cache instance shared by both runners."""
+    global _cache
+    if _cache is None:
+        _cache = IndexCache()
+    return _cache
@@ -1,91 +1,335 @@
-import os, json, re, asyncio, requests, arxiv
+import os, json, time, asyncio, arxiv
 from pathlib import Path
+from typing import Callable
 from dotenv import load_dotenv
-from paperqa import Docs, Settings
-from langchain.document_loaders import PyPDFLoader
-from optimize_arxiv import optimize_query, search_arxiv
-from fpdf import FPDF
+from paperqa import Docs
+from optimize_arxiv import optimize_queries, optimize_query, search_arxiv
+
+from backend.pipeline import metrics
+from backend.pipeline.downloader import arxiv_id_from_url, download_pdf, download_pdfs
+from backend.pipeline.answer_cache import fingerprint, get_answer_cache
+from backend.pipeline.index_cache import get_index_cache
+from backend.pipeline.rerank import candidates, rerank
+from backend.pipeline.resources import get_settings
+from backend.pipeline.sections import extract_relevant_sections
 
 load_dotenv()
 os.makedirs("papers", exist_ok=True)
 
+PQA_CONCURRENCY = int(os.getenv("PQA_CONCURRENCY", "4"))
+# Live arXiv API searches in flight at once for a batch (arXiv throttles bursts).
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "2"))
+
+QUESTION = "What future work or open research directions are suggested by the authors?"
 
 
-def _write_text_to_pdf(text: str, output_path: str):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    for line in text.split("\n"):
-        pdf.multi_cell(0, 10, line)
-    pdf.output(output_path)
+def _noop(stage: str) -> None:
+    pass
 
 
 def _extract_relevant_sections(pdf_path: str) -> str:
     """Return only limitation / future‑work / conclusion text."""
-    loader = PyPDFLoader(pdf_path)
-    section_text = ""
-    for page in loader.load():
-        matches = re.findall(
-            r"(?:limitations|future work|conclusion|further work|future directions)"
-            r"[\s\S]{0,1000}",
-            page.page_content,
-            re.IGNORECASE,
-        )
-        section_text += "\n\n".join(matches)
-    return section_text
+    return extract_relevant_sections(pdf_path)
 
 
 def _download_pdf(arxiv_url: str) -> str:
     """Download and cache to papers/<arxiv_id>.pdf."""
-    arxiv_id = arxiv_url.split("/")[-1]
-    pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-    file_path = f"papers/{arxiv_id}.pdf"
+    return download_pdf(arxiv_url)
 
-    if not Path(file_path).exists():
-        resp = requests.get(pdf_url, timeout=30)
-        resp.raise_for_status()
-        Path(file_path).write_bytes(resp.content)
-    return file_path
 
+async def _analyze(
+    file_paths: list[str],
+    questions: list[str],
+    *,
+    concurrency: int = PQA_CONCURRENCY,
+    sections_only: bool = False,
+    progress: Callable[[str], None] | None = None,
+    on_token: Callable[[str, str], None] | None = None,
+) -> tuple[dict[str, str], dict[str, float], bool]:
+    """
+    Ingest all papers, then fan out all questions, each stage bounded by a
+    semaphore of size ``concurrency``. Questions already answered for this
+    exact paper set come from the answer cache; if all of them do, the papers
+    are not even loaded.
+
+    With ``sections_only`` only the limitation / future‑work / conclusion
+    sections of each paper are embedded. ``on_token(question, chunk)``
+    receives answer tokens as they stream.
 
-async def _analyze(file_paths: list[str], questions: list[str]) -> dict[str, str]:
+    Returns (answers, per‑stage wall‑clock seconds, all answers cached).
+    """
     docs = Docs()
-    for p in file_paths:
-        await docs.aadd(p)
+    settings = get_settings()
+    cache = get_index_cache()
+    answer_cache = get_answer_cache()
+    sem = asyncio.Semaphore(concurrency)
+    timings: dict[str, float] = {}
+
+    doc_keys = [cache.key(p, settings, sections_only) for p in file_paths]
+    keys = {q: fingerprint(doc_keys, q, settings) for q in questions}
+    answers = {q: a for q in questions if (a := answer_cache.get(keys[q])) is not None}
+    pending = [q for q in questions if q not in answers]
+    if on_token:
+        for q, a in answers.items():
+            on_token(q, a)
+    if not pending:
+        return answers, timings, True
+
+    async def _ingest(p: str):
+        async with sem:
+            with metrics.stage("ingest"):
+                await cache.aadd(docs, p, settings, sections_only)
+
+    async def _ask(q: str) -> str:
+        callbacks = [lambda chunk: on_token(q, chunk)] if on_token else None
+        async with sem:
+            with metrics.stage("query"):
+                res = await docs.aquery(q, settings=settings, callbacks=callbacks)
+        metrics.record_answer(res)
+        answer_cache.put(keys[q], str(res))
+        return str(res)
+
+    progress = progress or _noop
+    progress("embedding")
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_ingest(p) for p in file_paths))
+    timings["ingest"] = time.perf_counter() - t0
 
-    settings = Settings(llm="gpt-4.1")
-    answers: dict[str, str] = {}
-    for q in questions:
-        res = await docs.aquery(q, settings=settings)
-        answers[q] = str(res)
-    return answers
+    progress("querying")
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(_ask(q) for q in pending))
+    timings["query"] = time.perf_counter() - t0
 
+    answers.update(zip(pending, results))
+    return {q: answers[q] for q in questions}, timings, False
 
 
-async def run(prompt: str, *, max_results: int = 5) -> dict:
+async def run(
+    prompt: str,
+    *,
+    max_results: int = 5,
+    sections_only: bool = False,
+    progress: Callable[[str], None] | None = None,
+    on_token: Callable[[str, str], None] | None = None,
+    workspace: str | Path | None = None,
+) -> dict:
     """
     Top‑level coroutine used by Celery / FastAPI.
 
     Args:
         prompt: free‑text field/topic query
-        max_results: arXiv papers to fetch
+        max_results: arXiv papers to fetch, the best of ``candidates(max_results)``
+            search results by abstract relevance
+        sections_only: embed only limitation / future‑work / conclusion sections
+        progress: optional callback receiving stage names ("downloading 3/5", …)
+        on_token: optional callback receiving (question, chunk) as answers stream
+        workspace: directory to write pipeline_output.json to (none if omitted);
+            the returned dict is the job's result of record
 
-    Returns: dict with keys answers / pdf_paths / query
+    Returns: dict with keys answers / pdf_paths / query / timings / cached
     """
-    query_str, filters = optimize_query(prompt)
-    papers = search_arxiv(query_str, filters)[:max_results]
+    progress = progress or _noop
+    progress("searching")
+    with metrics.stage("optimize_query"):
+        query_str, filters = optimize_query(prompt)
+    # fetch only the pages we need, plus the over‑fetch the re‑ranker picks from
+    filters["max_results"] = candidates(max_results)
+    with metrics.stage("search_arxiv"):
+        papers = search_arxiv(query_str, filters)
+    with metrics.stage("rerank"):
+        papers = rerank(prompt, papers, max_results)
+
+    progress(f"downloading 0/{len(papers)}")
+    t0 = time.perf_counter()
+    with metrics.stage("download"):
+        pdf_paths = await asyncio.to_thread(
+            download_pdfs,
+            [p["url"] for p in papers],
+            on_done=lambda done, total: progress(f"downloading {done}/{total}"),
+        )
+    download_s = time.perf_counter() - t0
+
+    questions = [QUESTION]
+    answers, timings, cached = await _analyze(
+        pdf_paths,
+        questions,
+        sections_only=sections_only,
+        progress=progress,
+        on_token=on_token,
+    )
+    timings = {"download": download_s, **timings}
+
+    if workspace is not None:
+        Path(workspace, "pipeline_output.json").write_text(json.dumps(answers, indent=2))
+
+    return {
+        "answers": answers,
+        "pdf_paths": pdf_paths,
+        "query": query_str,
+        "timings": timings,
+        "cached": cached,
+    }
+
+
+async def run_batch(
+    prompts: list[str],
+    *,
+    max_results: int = 5,
+    sections_only: bool = False,
+    concurrency: int = PQA_CONCURRENCY,
+    progress: Callable[[str], None] | None = None,
+    on_token: Callable[[str, str], None] | None = None,
+) -> dict:
+    """
+    Answer many related topics in one pass over a shared paper pool.
+
+    Every topic is searched and re‑ranked, the union of their arXiv IDs is
+    de‑duplicated,
+    each paper is downloaded and embedded once, and each topic is then
+    answered against a ``Docs`` holding only its own papers (replayed from
+    the already‑embedded texts, so no paper is embedded twice).
+    ``on_token(prompt, chunk)`` receives answer tokens per topic.
 
-    pdf_paths = [_download_pdf(p["url"]) for p in papers]
-    questions = [
-        "What future work or open research directions are suggested by the authors?"
+    Returns: dict with keys topics / pdf_paths / totals / timings, where each
+    topic carries prompt / query / answer / pdf_paths / cached and ``totals``
+    counts what the shared pool saved over running the topics one by one.
+    """
+    progress = progress or _noop
+    settings = get_settings()
+    cache = get_index_cache()
+    answer_cache = get_answer_cache()
+    sem = asyncio.Semaphore(concurrency)
+    timings: dict[str, float] = {}
+
+    progress("searching")
+    t0 = time.perf_counter()
+    with metrics.stage("optimize_query"):
+        plans = optimize_queries(prompts)
+
+    search_sem = asyncio.Semaphore(SEARCH_CONCURRENCY)
+
+    def _search(prompt: str, q: str, f: dict) -> list[dict]:
+        with metrics.stage("search_arxiv"):
+            papers = search_arxiv(q, {**f, "max_results": candidates(max_results)})
+        with metrics.stage("rerank"):
+            return rerank(prompt, papers, max_results)
+
+    async def _bounded_search(prompt: str, q: str, f: dict) -> list[dict]:
+        async with search_sem:
+            return await asyncio.to_thread(_search, prompt, q, f)
+
+    searches = await asyncio.gather(
+        *(_bounded_search(p, q, f) for p, (q, f) in zip(prompts, plans))
+    )
+    topic_urls = [[p["url"] for p in papers] for papers in searches]
+    by_id = {arxiv_id_from_url(u): u for urls in topic_urls for u in urls}
+    timings["search"] = time.perf_counter() - t0
+
+    progress(f"downloading 0/{len(by_id)}")
+    t0 = time.perf_counter()
+    with metrics.stage("download"):
+        paths = await asyncio.to_thread(
+            download_pdfs,
+            list(by_id.values()),
+            on_done=lambda done, total: progress(f"downloading {done}/{total}"),
+        )
+    path_of = dict(zip(by_id, paths))
+    timings["download"] = time.perf_counter() - t0
+
+    topic_paths = [
+        list(dict.fromkeys(path_of[arxiv_id_from_url(u)] for u in urls)) for urls in topic_urls
     ]
-    answers = await _analyze(pdf_paths, questions)
+    doc_keys = {p: cache.key(p, settings, sections_only) for p in paths}
+    keys = [fingerprint([doc_keys[p] for p in tp], QUESTION, settings) for tp in topic_paths]
+    answers: list[str | None] = [answer_cache.get(k) for k in keys]
+    for prompt, answer in zip(prompts, answers):
+        if answer is not None and on_token:
+            on_token(prompt, answer)
 
-    Path("pipeline_output.json").write_text(json.dumps(answers, indent=2))
+    # Only papers that some un‑cached topic still needs are loaded at all.
+    needed = list(dict.fromkeys(
+        p for tp, a in zip(topic_paths, answers) if a is None for p in tp
+    ))
+    entries: dict[str, tuple] = {}
+    embedded = 0
 
-    return {"answers": answers, "pdf_paths": pdf_paths, "query": query_str}
+    async def _load(p: str):
+        nonlocal embedded
+        async with sem:
+            with metrics.stage("ingest"):
+                entries[p], hit = await cache.aload(p, settings, sections_only)
+        embedded += not hit
+        progress(f"embedding {len(entries)}/{len(needed)}")
+
+    t0 = time.perf_counter()
+    if needed:
+        progress(f"embedding 0/{len(needed)}")
+        await asyncio.gather(*(_load(p) for p in needed))
+    timings["ingest"] = time.perf_counter() - t0
+
+    pending = [i for i, a in enumerate(answers) if a is None]
+    answered = 0
+
+    async def _ask(i: int):
+        nonlocal answered
+        prompt = prompts[i]
+        callbacks = [lambda chunk: on_token(prompt, chunk)] if on_token else None
+        docs = Docs()
+        for p in topic_paths[i]:
+            doc, texts = entries[p]
+            await docs.aadd_texts(texts, doc, settings=settings)
+        async with sem:
+            with metrics.stage("query"):
+                res = await docs.aquery(QUESTION, settings=settings, callbacks=callbacks)
+        metrics.record_answer(res)
+        answers[i] = str(res)
+        answer_cache.put(keys[i], answers[i])
+        answered += 1
+        progress(f"querying {answered}/{len(pending)}")
+
+    t0 = time.perf_counter()
+    if pending:
+        progress(f"querying 0/{len(pending)}")
+        await asyncio.gather(*(_ask(i) for i in pending))
+    timings["query"] = time.perf_counter() - t0
+
+    requested = sum(len(tp) for tp in topic_paths)
+    return {
+        "topics": [
+            {
+                "prompt": prompt,
+                "query": query,
+                "answer": answers[i],
+                "pdf_paths": topic_paths[i],
+                "cached": i not in pending,
+            }
+            for i, (prompt, (query, _)) in enumerate(zip(prompts, plans))
+        ],
+        "pdf_paths": paths,
+        "totals": {
+            "topics": len(prompts),
+            "papers_requested": requested,
+            "papers_unique": len(paths),
+            "downloads_saved": requested - len(paths),
+            "papers_embedded": embedded,
+            "embeddings_saved": requested - embedded,
+            "answers_cached": len(prompts) - len(pending),
+        },
+        "timings": timings,
+    }
+
+
+def context_for(result: dict, pdf_path: str) -> dict | None:
+    """
+    The analysis a future‑work job on ``pdf_path`` should see, taken from a
+    ``run`` or ``run_batch`` result; None if that job never fetched the paper.
+    """
+    if pdf_path not in result.get("pdf_paths", []):
+        return None
+    if "answers" in result:
+        return result["answers"]
+    return {t["prompt"]: t["answer"] for t in result["topics"] if pdf_path in t["pdf_paths"]}
 
 
 if __name__ == "__main__":
-    asyncio.run(run(input("Research field (incl. timeframe, author, etc.): ")))
+    asyncio.run(run(input("Research field (incl. timeframe, author, etc.): "), workspace="."))
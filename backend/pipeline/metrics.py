@@ -0,0 +1,163 @@
+"""
+Per‑job stage timing, token / cache counters and latency histograms.
+
+• ``stage("download")`` times a block; ``count("prompt_tokens", n)`` bumps a
+  counter. Both report to the ``JobMetrics`` of the job currently running,
+  which lives in a ``ContextVar`` – runners need no extra parameters, and
+  ``asyncio.gather`` / ``to_thread`` children report to the same job.
+  Outside ``track()`` they are no‑ops.
+• ``JobMetrics.summary()`` is what the worker stores in the job hash:
+  seconds per stage (summed over concurrent calls, so it can exceed the
+  wall‑clock total), call counts, token counts and cache hit ratios.
+• Latencies are also bucketed per stage so the worker can add them to the
+  shared Redis histograms that ``render_prometheus`` turns into the
+  ``/metrics`` exposition.
+"""
+
+from __future__ import annotations
+
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Redis layout shared by the worker (writes) and the API (reads).
+STAGES_KEY = "metrics:stages"
+COUNTERS_KEY = "metrics:counters"
+
+
+def stage_key(name: str) -> str:
+    return f"metrics:stage:{name}"
+
+
+def bucket_field(seconds: float) -> str:
+    """Hash field of the (non‑cumulative) bucket ``seconds`` falls into."""
+    return f"b{bisect.bisect_left(BUCKETS, seconds)}"
+
+
+@dataclass
+class JobMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    seconds: dict[str, float] = field(default_factory=dict)
+    calls: dict[str, int] = field(default_factory=dict)
+    buckets: dict[str, dict[str, int]] = field(default_factory=dict)
+    counters: dict[str, float] = field(default_factory=dict)
+
+    def observe(self, name: str, seconds: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        hist = self.buckets.setdefault(name, {})
+        b = bucket_field(seconds)
+        hist[b] = hist.get(b, 0) + 1
+
+    def count(self, name: str, n: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def _cache(self, name: str) -> dict:
+        hits = int(self.counters.get(f"{name}_cache_hit", 0))
+        misses = int(self.counters.get(f"{name}_cache_miss", 0))
+        lookups = hits + misses
+        return {"hits": hits, "misses": misses, "hit_ratio": hits / lookups if lookups else 0.0}
+
+    def summary(self) -> dict:
+        return {
+            "total_s": round(time.perf_counter() - self.started, 4),
+            "stages_s": {k: round(v, 4) for k, v in self.seconds.items()},
+            "calls": dict(self.calls),
+            "tokens": {
+                k: int(self.counters.get(k, 0))
+                for k in ("prompt_tokens", "completion_tokens", "streamed_chunks")
+            },
+            "cost_usd": round(self.counters.get("cost_usd", 0.0), 6),
+            "cache": {"index": self._cache("index"), "answer": self._cache("answer")},
+        }
+
+
+_current: ContextVar[JobMetrics | None] = ContextVar("job_metrics", default=None)
+
+
+def current() -> JobMetrics | None:
+    return _current.get()
+
+
+@contextmanager
+def track(m: JobMetrics | None = None) -> Iterator[JobMetrics]:
+    """Collect the metrics of everything run inside the block (one job) into ``m``."""
+    m = m if m is not None else JobMetrics()
+    token = _current.set(m)
+    try:
+        yield m
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block as one call of stage ``name``."""
+    m = _current.get()
+    if m is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        m.observe(name, time.perf_counter() - t0)
+
+
+def count(name: str, n: float = 1) -> None:
+    m = _current.get()
+    if m is not None:
+        m.count(name, n)
+
+
+def record_answer(res) -> None:
+    """Add the token usage / cost PaperQA reports on a query result."""
+    for prompt_tokens, completion_tokens in getattr(res, "token_counts", {}).values():
+        count("prompt_tokens", prompt_tokens)
+        count("completion_tokens", completion_tokens)
+    count("cost_usd", getattr(res, "cost", 0.0) or 0.0)
+
+
+def render_prometheus(
+    stages: dict[str, dict[str, str]],
+    counters: dict[str, str],
+    queue_depth: dict[str, int] | None = None,
+) -> str:
+    """
+    Prometheus text exposition of the aggregated histograms (``stages`` maps a
+    stage name to its Redis hash), counters and current queue depths.
+    """
+    lines = [
+        "# HELP research_stage_seconds Latency of each pipeline stage.",
+        "# TYPE research_stage_seconds histogram",
+    ]
+    for name in sorted(stages):
+        h = stages[name]
+        cumulative = 0
+        for i, le in enumerate(BUCKETS + (float("inf"),)):
+            cumulative += int(h.get(f"b{i}", 0))
+            bound = "+Inf" if le == float("inf") else repr(le)
+            lines.append(f'research_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'research_stage_seconds_sum{{stage="{name}"}} {float(h.get("sum", 0))}')
+        lines.append(f'research_stage_seconds_count{{stage="{name}"}} {int(h.get("count", 0))}')
+
+    lines += [
+        "# HELP research_events_total Tokens, cost and cache lookups across all jobs.",
+        "# TYPE research_events_total counter",
+    ]
+    for name in sorted(counters):
+        lines.append(f'research_events_total{{event="{name}"}} {float(counters[name])}')
+
+    lines += [
+        "# HELP research_queue_depth Jobs waiting in each Celery queue.",
+        "# TYPE research_queue_depth gauge",
+    ]
+    for name, depth in sorted((queue_depth or {}).items()):
+        lines.append(f'research_queue_depth{{queue="{name}"}} {depth}')
+    return "\n".join(lines) + "\n"
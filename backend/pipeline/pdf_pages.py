@@ -0,0 +1,143 @@
+"""
+Streaming, page‑parallel PDF text extraction with a per‑page disk cache.
+
+``iter_pages`` yields page texts in order without ever holding the whole
+document, so callers can stop as soon as they have what they need. Pages are
+produced in batches: already‑cached pages are read from disk, the rest are
+extracted either in‑process or – for long papers – across a process pool,
+then written back to the cache. Only the batches a caller actually consumes
+are ever extracted.
+
+Daemonic processes may not start children, so inside Celery's default
+prefork children extraction is serial; a worker started with
+``--pool threads`` (or ``solo``) runs tasks in its main process and gets the
+page‑parallel pool.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+from pypdf import PdfReader
+
+from backend.pipeline.storage import evict_lru, file_digest
+
+PAGE_CACHE_DIR: str = os.getenv("PAGE_CACHE_DIR", "papers/.pages")
+PAGE_CACHE_MAX_BYTES: int = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(512 * 1024**2)))
+PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Papers with more pages than this are extracted page‑parallel.
+PAGE_PARALLEL_THRESHOLD: int = int(os.getenv("PAGE_PARALLEL_THRESHOLD", "24"))
+PAGE_BATCH: int = 8
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    """Shared process pool, or None where child processes are not allowed."""
+    global _pool
+    if PDF_WORKERS < 2 or multiprocessing.current_process().daemon:
+        return None  # e.g. inside a Celery prefork child
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the caller may be a multi‑threaded worker, unsafe to fork
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _pool
+
+
+def _extract_range(pdf_path: str, indices: list[int]) -> list[str]:
+    """Worker: extract the given page indices from ``pdf_path``."""
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in indices]
+
+
+class _PageCache:
+    def __init__(self, pdf_path: str, root: str | Path = PAGE_CACHE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.digest = file_digest(pdf_path)
+        self.wrote = False
+
+    def _path(self, suffix: str) -> Path:
+        return self.root / f"{self.digest}-{suffix}"
+
+    def _write(self, suffix: str, text: str) -> None:
+        """Atomic write; a unique temp name so concurrent writers never collide."""
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fh:
+                fh.write(text)
+            os.replace(tmp, self._path(suffix))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def page_count(self) -> int | None:
+        try:
+            return int(self._path("count.txt").read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set_page_count(self, n: int) -> None:
+        self._write("count.txt", str(n))
+
+    def get(self, i: int) -> str | None:
+        try:
+            return self._path(f"{i}.txt").read_text()
+        except FileNotFoundError:
+            return None
+
+    def put(self, i: int, text: str) -> None:
+        self._write(f"{i}.txt", text)
+        self.wrote = True
+
+
+def iter_pages(pdf_path: str | Path) -> Iterator[str]:
+    """Yield the text of each page of ``pdf_path`` in order."""
+    pdf_path = str(pdf_path)
+    cache = _PageCache(pdf_path)
+    reader: PdfReader | None = None
+
+    n = cache.page_count()
+    if n is None:
+        reader = PdfReader(pdf_path)
+        n = len(reader.pages)
+        cache.set_page_count(n)
+
+    pool = _get_pool() if n > PAGE_PARALLEL_THRESHOLD else None
+    batch = PAGE_BATCH * (PDF_WORKERS if pool else 1)
+    try:
+        yield from _batches(pdf_path, cache, reader, pool, n, batch)
+    finally:
+        # Also runs when the caller stops early and closes the generator.
+        if cache.wrote:
+            evict_lru(cache.root, "*.txt", PAGE_CACHE_MAX_BYTES)
+
+
+def _batches(pdf_path, cache, reader, pool, n, batch) -> Iterator[str]:
+    for start in range(0, n, batch):
+        indices = list(range(start, min(start + batch, n)))
+        pages = {i: cache.get(i) for i in indices}
+        missing = [i for i, text in pages.items() if text is None]
+
+        if missing and pool is not None:
+            parts = [missing[k::PDF_WORKERS] for k in range(PDF_WORKERS)]
+            futures = [pool.submit(_extract_range, pdf_path, part) for part in parts if part]
+            for part, fut in zip((p for p in parts if p), futures):
+                pages.update(zip(part, fut.result()))
+        elif missing:
+            reader = reader or PdfReader(pdf_path)
+            pages.update((i, reader.pages[i].extract_text() or "") for i in missing)
+
+        for i in missing:
+            cache.put(i, pages[i])
+        for i in indices:
+            yield pages[i]
@@ -0,0 +1,80 @@
+"""
+Abstract‑level re‑ranking of search results before any PDF is fetched.
+
+arXiv returns papers newest first (or by its own relevance), so the top
+``max_results`` are not necessarily the ones about the prompt. Runners ask
+the search for ``RERANK_OVERFETCH`` times as many candidates, score each
+title + abstract against the prompt with Okapi BM25 and only download and
+embed the best ``k``. Scoring a few dozen abstracts takes well under a
+millisecond; ``RERANK_OVERFETCH=1`` turns the stage off.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+from collections import Counter
+
+RERANK_OVERFETCH: float = float(os.getenv("RERANK_OVERFETCH", "3"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+TITLE_WEIGHT = 2  # title terms count as if they appeared this many times
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    """a an the and or of for in on at to from by with about into is are was
+    were be been this that these those we our it its paper papers recent
+    research show find work works using use based""".split()
+)
+
+
+def terms(text: str) -> list[str]:
+    """Lowercased content words with a plural ``s`` stripped."""
+    return [
+        t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+        for t in _TOKEN_RE.findall(text.lower())
+        if t not in _STOPWORDS
+    ]
+
+
+def candidates(k: int) -> int:
+    """How many search results to fetch to keep ``k`` after re‑ranking."""
+    return max(k, math.ceil(k * RERANK_OVERFETCH))
+
+
+def bm25_scores(query: str, documents: list[str]) -> list[float]:
+    """BM25 score of each document for ``query``, IDF taken over ``documents``."""
+    docs = [Counter(terms(d)) for d in documents]
+    q_terms = set(terms(query))
+    if not docs or not q_terms:
+        return [0.0] * len(docs)
+    lengths = [sum(tf.values()) for tf in docs]
+    avg_len = sum(lengths) / len(docs) or 1.0
+    n = len(docs)
+    idf = {}
+    for t in q_terms:
+        df = sum(1 for tf in docs if t in tf)
+        idf[t] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    scores = []
+    for tf, length in zip(docs, lengths):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+        scores.append(sum(
+            idf[t] * tf[t] * (BM25_K1 + 1) / (tf[t] + norm) for t in q_terms if t in tf
+        ))
+    return scores
+
+
+def rerank(prompt: str, papers: list[dict], k: int) -> list[dict]:
+    """
+    The ``k`` papers whose title + ``summary`` best match ``prompt``. Ties
+    keep the search order, so results without abstracts come back exactly as
+    the search ranked them.
+    """
+    if len(papers) <= 1:
+        return papers[:k]
+    texts = [" ".join([p.get("title", "")] * TITLE_WEIGHT + [p.get("summary", "")]) for p in papers]
+    scores = bm25_scores(prompt, texts)
+    order = sorted(range(len(papers)), key=lambda i: -scores[i])[:k]
+    return [papers[i] for i in order]
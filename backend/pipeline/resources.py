@@ -0,0 +1,41 @@
+"""
+Process‑wide objects shared by every job a worker runs.
+
+``Settings`` validation, the pooled HTTP session, the on‑disk caches and the
+spaCy pipeline are built once per process instead of once per task;
+``warm()`` is called from the Celery ``worker_process_init`` signal so the
+first job does not pay for it.
+"""
+
+from __future__ import annotations
+
+import functools
+
+from paperqa import Settings
+
+from optimize_arxiv import get_nlp
+
+from backend.pipeline.answer_cache import get_answer_cache
+from backend.pipeline.downloader import get_session
+from backend.pipeline.index_cache import get_index_cache
+
+DEFAULT_LLM = "gpt-4.1"
+
+
+@functools.lru_cache(maxsize=8)
+def get_settings(llm: str = DEFAULT_LLM) -> Settings:
+    """Shared, read‑only PaperQA settings for ``llm``."""
+    return Settings(llm=llm)
+
+
+def warm(llm: str = DEFAULT_LLM) -> None:
+    """
+    Build the shared settings, clients and caches ahead of the first job.
+    PaperQA builds its LLM / embedding wrappers per call, so those are not
+    warmed here.
+    """
+    get_settings(llm)
+    get_session()
+    get_index_cache()
+    get_answer_cache()
+    get_nlp()
@@ -0,0 +1,278 @@
+"""
+Section‑targeted ingestion: pull only the limitations / future‑work /
+conclusion sections out of a paper and hand them to PaperQA as pre‑chunked
+texts, instead of embedding the whole PDF.
+
+Sections are found with a header detector that recognises numbered
+(``5``, ``5.2``, ``VI.``, ``A.``) and un‑numbered canonical headings on their
+own line; a target section runs until the next heading of any kind. Papers
+without recognisable headings fall back to the old keyword windows.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+
+from paperqa import Settings
+from paperqa.types import Doc, Text
+
+from backend.pipeline.pdf_pages import iter_pages
+
+TARGET_SECTIONS = (
+    "limitation",
+    "limitations",
+    "future work",
+    "future works",
+    "further work",
+    "future directions",
+    "future research",
+    "open problems",
+    "outlook",
+    "conclusion",
+    "conclusions",
+    "concluding remarks",
+)
+
+OTHER_SECTIONS = (
+    "abstract",
+    "introduction",
+    "background",
+    "related work",
+    "preliminaries",
+    "method",
+    "methods",
+    "methodology",
+    "approach",
+    "experiments",
+    "experimental setup",
+    "evaluation",
+    "results",
+    "discussion",
+    "acknowledgment",
+    "acknowledgments",
+    "acknowledgement",
+    "acknowledgements",
+    "references",
+    "bibliography",
+    "appendix",
+)
+
+_NUMBER = r"(?:\d{1,2}(?:\.\d{1,2})*\.?|(?:[IVX]{1,5}|[A-H])[.)])"
+_KNOWN = "|".join(
+    sorted((re.escape(s) for s in TARGET_SECTIONS + OTHER_SECTIONS), key=len, reverse=True)
+)
+# A heading is a short line: optional section number, then either a known
+# section name (possibly followed by a subtitle) or any short title if numbered.
+_HEADER_RE = re.compile(
+    rf"^\s*(?:(?P<num>{_NUMBER})\s+)?(?P<title>(?:{_KNOWN})\b[^\n]{{0,60}}|[A-Z][^\n]{{2,60}})\s*$",
+    re.IGNORECASE,
+)
+_TARGET_RE = re.compile(
+    r"^(?:" + "|".join(re.escape(s) for s in TARGET_SECTIONS) + r")\b", re.IGNORECASE
+)
+_KNOWN_RE = re.compile(rf"^(?:{_KNOWN})\b", re.IGNORECASE)
+# Back matter: once one of these follows a target section we can stop reading.
+_END_RE = re.compile(r"^(?:references|bibliography|acknowledge?ments?|appendix)\b", re.IGNORECASE)
+
+_KEYWORDS = r"limitations|future work|conclusion|further work|future directions"
+# One pass over the document finds both kinds of hit: a zero‑width lookahead
+# at each line start captures heading candidates (so keyword hits later on
+# the same line are still seen), and a case‑insensitive alternation finds the
+# keyword anchors for the fallback windows.
+_SCAN_RE = re.compile(
+    rf"^(?=(?P<line>[ \t]*(?:{_NUMBER}[ \t]+)?[A-Z][^\n]{{2,88}}$))|(?i:(?P<kw>{_KEYWORDS}))",
+    re.MULTILINE,
+)
+KEYWORD_WINDOW = 1000
+
+_CUE_RE = re.compile(
+    r"\b(?:future|further|limitation|limited|extend|extension|open|remain|improv|investigat|explor)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Section:
+    title: str
+    text: str
+    start: int = 0  # character offsets into the concatenated document
+    end: int = 0
+    pages: tuple[int, int] = (1, 1)  # first / last 1‑based page
+    score: float = 0.0
+
+
+def _heading(line: str) -> str | None:
+    """Return the heading title if ``line`` looks like a section header."""
+    if len(line) > 90:
+        return None
+    m = _HEADER_RE.match(line)
+    if not m:
+        return None
+    title = m.group("title").strip()
+    if not title[0].isupper() or title.endswith((".", ",", ";", "-")):
+        return None
+    if known := _KNOWN_RE.match(title):
+        # A known name alone, or with a short subtitle ("Conclusion and Outlook").
+        rest = title[known.end():].strip(" :")
+        return title if len(rest.split()) <= 6 else None
+    # Unknown titles only count when numbered.
+    if m.group("num") and len(title.split()) <= 8:
+        return title
+    return None
+
+
+def _score(title: str, text: str, start: int, doc_len: int) -> float:
+    """Rank candidates: section type, density of forward‑looking cues, position."""
+    t = title.lower()
+    base = 3.0 if ("limitation" in t or "future" in t or "further" in t) else 2.0 if "conclu" in t else 1.0
+    cues_per_k = len(_CUE_RE.findall(text)) * 1000 / max(len(text), 1)
+    return round(base + 0.5 * min(cues_per_k, 5.0) + start / max(doc_len, 1), 3)
+
+
+class SectionMatcher:
+    """
+    Single‑pass section scanner over a document fed page by page.
+
+    Every character is scanned once by ``_SCAN_RE``; hits are kept as offsets
+    into the concatenated text (pages joined by newlines) and mapped back to
+    page numbers. ``finish`` returns the target sections, or – for papers
+    without recognisable headings – merged, de‑duplicated keyword windows.
+    """
+
+    def __init__(self, window: int = KEYWORD_WINDOW):
+        self.window = window
+        self.done = False
+        self._pages: list[str] = []
+        self._starts: list[int] = []
+        self._length = 0
+        self._headings: list[tuple[int, int, str]] = []  # (line start, line end, title)
+        self._keywords: list[tuple[int, int]] = []
+        self._found_target = False
+
+    def feed(self, page: str) -> bool:
+        """Consume one page; returns True once the back matter has been reached."""
+        base = self._length + (1 if self._pages else 0)
+        self._pages.append(page)
+        self._starts.append(base)
+        self._length = base + len(page)
+        for m in _SCAN_RE.finditer(page):
+            if m.group("kw"):
+                self._keywords.append((base + m.start(), base + m.end()))
+                continue
+            title = _heading(m.group("line"))
+            if title is None:
+                continue
+            if self._found_target and _END_RE.match(title):
+                self._headings.append((base + m.start(), base + m.end("line"), title))
+                self.done = True
+                return True
+            self._found_target |= bool(_TARGET_RE.match(title))
+            self._headings.append((base + m.start(), base + m.end("line"), title))
+        return False
+
+    def _page_of(self, offset: int) -> int:
+        return bisect_right(self._starts, offset)
+
+    def _make(self, doc: str, title: str, start: int, end: int) -> Section:
+        text = doc[start:end].strip()
+        return Section(
+            title=title,
+            text=text,
+            start=start,
+            end=end,
+            pages=(self._page_of(start), self._page_of(max(start, end - 1))),
+            score=_score(title, text, start, len(doc)),
+        )
+
+    def finish(self) -> list[Section]:
+        doc = "\n".join(self._pages)
+        sections = []
+        bounds = self._headings + [(len(doc), len(doc), "")]
+        for (_, body_start, title), (next_start, _, _) in zip(bounds, bounds[1:]):
+            if _TARGET_RE.match(title):
+                section = self._make(doc, title, body_start, next_start)
+                if section.text:
+                    sections.append(section)
+        if sections:
+            return sections
+
+        # No headings: merge overlapping keyword windows into compact spans.
+        spans: list[list[int]] = []
+        for kw_start, kw_end in self._keywords:
+            end = min(kw_end + self.window, len(doc))
+            if spans and kw_start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([kw_start, end])
+        return [self._make(doc, doc[a:b].split("\n", 1)[0][:60], a, b) for a, b in spans]
+
+
+def find_sections(text: str) -> list[Section]:
+    """Split ``text`` on headings and keep only the target sections."""
+    matcher = SectionMatcher()
+    matcher.feed(text)
+    return matcher.finish()
+
+
+def pdf_text(pdf_path: str | Path) -> str:
+    return "\n".join(iter_pages(pdf_path))
+
+
+def scan_pdf(pdf_path: str | Path) -> list[Section]:
+    """
+    Scored limitation / future‑work / conclusion sections of ``pdf_path``.
+
+    Pages are streamed and reading stops at the back matter (references,
+    acknowledgements, appendix) once a target section has been found.
+    """
+    matcher = SectionMatcher()
+    pages = iter_pages(pdf_path)
+    try:
+        for page in pages:
+            if matcher.feed(page):
+                break
+    finally:
+        pages.close()
+    return matcher.finish()
+
+
+def extract_relevant_sections(pdf_path: str | Path) -> str:
+    """Return only limitation / future‑work / conclusion text."""
+    return "\n\n".join(f"{s.title}\n{s.text}" for s in scan_pdf(pdf_path))
+
+
+def chunking(settings: Settings) -> tuple[int, int]:
+    """
+    ``(chunk_size, overlap)`` in characters from the parsing settings: newer
+    PaperQA keeps them in ``parsing.reader_config`` (``chunk_chars`` /
+    ``overlap``), older releases as ``parsing.chunk_size`` / ``overlap``.
+    """
+    parsing = settings.parsing
+    reader_config = getattr(parsing, "reader_config", None)
+    if reader_config:
+        return int(reader_config["chunk_chars"]), int(reader_config["overlap"])
+    return parsing.chunk_size, parsing.overlap
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int) -> list[str]:
+    """Fixed‑size character chunks with ``overlap`` characters of context."""
+    step = max(1, chunk_size - overlap)
+    return [text[i : i + chunk_size] for i in range(0, max(len(text) - overlap, 1), step)]
+
+
+def section_texts(pdf_path: str | Path, settings: Settings) -> tuple[Doc, list[Text]] | None:
+    """
+    Build an un‑embedded PaperQA ``Doc`` + chunks from the target sections of
+    ``pdf_path``; None if nothing relevant was found.
+    """
+    text = extract_relevant_sections(pdf_path)
+    if not text.strip():
+        return None
+    name = Path(pdf_path).stem
+    doc = Doc(docname=name, citation=f"{name}, arXiv", dockey=f"{name}-sections")
+    chunks = chunk_text(text, *chunking(settings))
+    texts = [Text(text=c, name=f"{name} sections chunk {i + 1}", doc=doc) for i, c in enumerate(chunks)]
+    return doc, texts
@@ -0,0 +1,83 @@
+"""
+In‑process store of warm future‑work sessions.
+
+A session keeps the ``Docs`` already built for its paper(s), the ``Settings`` and
+the answers produced so far, so that "pick idea" / "generate code" follow‑ups
+only pay for their own LLM calls. Sessions expire after ``SESSION_TTL``
+seconds of inactivity and the store is capped at ``SESSION_MAX`` entries
+(least recently used first).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from paperqa import Docs, Settings
+
+SESSION_TTL: int = int(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX: int = int(os.getenv("SESSION_MAX", "64"))
+
+
+@dataclass
+class Session:
+    session_id: str
+    pdf_paths: list[str]
+    docs: Docs
+    settings: Settings
+    doc_keys: list[str] = field(default_factory=list)
+    ideas: str = ""
+    choice: str | None = None
+    project: str = ""
+    code: str = ""
+    cached: bool = False
+    last_used: float = field(default_factory=time.monotonic)
+
+    def answers(self) -> dict:
+        return {
+            "ideas": self.ideas,
+            "project": self.project,
+            "code": self.code,
+            "cached": self.cached,
+        }
+
+
+class SessionStore:
+    """TTL + LRU bounded mapping of ``session_id`` → ``Session``."""
+
+    def __init__(self, ttl: int = SESSION_TTL, max_sessions: int = SESSION_MAX):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+
+    def get(self, session_id: str) -> Session | None:
+        self.evict_expired()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def put(self, session: Session) -> None:
+        session.last_used = time.monotonic()
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        self.evict_expired()
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def evict_expired(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_used >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+sessions = SessionStore()
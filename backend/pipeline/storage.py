@@ -0,0 +1,45 @@
+"""
+Small filesystem helpers shared by the on‑disk caches.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+from pathlib import Path
+
+_CHUNK = 1 << 20
+
+
+@functools.lru_cache(maxsize=1024)
+def _digest(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_digest(path: str | Path) -> str:
+    """SHA‑256 of a file's contents, memoised on (path, mtime, size)."""
+    st = os.stat(path)
+    return _digest(str(path), st.st_mtime_ns, st.st_size)
+
+
+def evict_lru(root: Path, pattern: str, max_bytes: int) -> None:
+    """Delete the least recently used (oldest mtime) files until under ``max_bytes``."""
+    entries = []
+    total = 0
+    for p in root.glob(pattern):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+        total += st.st_size
+    entries.sort()
+    while total > max_bytes and entries:
+        _, size, p = entries.pop(0)
+        p.unlink(missing_ok=True)
+        total -= size
@@ -1,81 +1,425 @@
 """
 Celery worker definitions for limitation and future_work jobs.
 
-• Stores job status and results in Redis (hash keyed by ``job_id``) so that
-  the FastAPI layer can poll ``/jobs/{job_id}`` for progress.
+• Stores job status in a small Redis hash ``job:{job_id}`` so that the
+  FastAPI layer can poll ``/jobs/{job_id}`` cheaply; the (large) result is a
+  separate zlib‑compressed JSON string ``job:{job_id}:result``. Both expire
+  after ``JOB_TTL`` seconds.
+• Every status / stage change is also published on ``job:{job_id}:events``
+  so ``/jobs/{job_id}/events`` can push it to the browser as it happens.
+• Answer tokens are appended to the Redis stream ``job:{job_id}:tokens`` as
+  the LLM produces them and served by ``/jobs/{job_id}/tokens``.
+• Results live only in Redis, never in files (the runners' ``workspace``
+  is left to the CLI), so any number of workers can share one host;
+  future‑work jobs read their context from the limitation job's result.
 • Also returns the result so that Celery’s backend retains the payload for
   inspection or retries, giving you the best of both approaches in the two
   original files.
+• Every task runs under ``metrics.track()``: per‑stage durations, token counts
+  and cache hit ratios land in the job hash (``metrics`` field) when it
+  finishes, and its latencies are added to the Redis histograms behind
+  ``/metrics``.
+• Jobs are routed by class: heavy download + embedding jobs go to the
+  ``ingest`` queue, latency‑sensitive future‑work / follow‑up jobs to the
+  ``interactive`` queue, each with a broker priority, so the two can be
+  served by separately sized worker pools (see readme). The time a job
+  waited in its queue is recorded as ``wait_s`` and in ``/metrics``.
+• Identical requests are coalesced: the API claims ``inflight:<hash of the
+  normalised parameters>`` for the job it enqueues and later submitters
+  attach to that job; the worker releases the claim when the job ends.
+• Tasks are ``async def`` functions registered through ``async_task`` and run
+  on one long‑lived event loop per worker thread; shared clients, caches and
+  settings are warmed once per process via ``worker_process_init``.
 """
 
 from __future__ import annotations
 
 import asyncio
+import functools
+import hashlib
 import json
 import os
+import threading
+import time
+import zlib
 
 import redis
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+from kombu import Queue
 
-from backend.pipeline import limitation_runner, future_work_runner
+from backend.pipeline import limitation_runner, future_work_runner, metrics, resources
+from backend.pipeline.sessions import SESSION_TTL, sessions
 
 
 REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 celery_app = Celery("research_backend", broker=REDIS_URL, backend=REDIS_URL)
 
 r = redis.from_url(REDIS_URL, decode_responses=True)
+rb = redis.from_url(REDIS_URL)  # bytes client for compressed results
+
+JOB_TTL: int = int(os.getenv("JOB_TTL", str(7 * 24 * 3600)))
+
+QUEUE_INGEST = "ingest"
+QUEUE_INTERACTIVE = "interactive"
+# Redis broker priorities: 0 is served first. One sub‑queue per step.
+PRIORITY_STEPS = list(range(10))
+PRIORITY_SEP = ":"
+
+# task name → (queue, priority)
+ROUTES: dict[str, tuple[str, int]] = {
+    "jobs.run_future_followup": (QUEUE_INTERACTIVE, 0),
+    "jobs.run_future_work": (QUEUE_INTERACTIVE, 2),
+    "jobs.run_limitation": (QUEUE_INGEST, 5),
+    "jobs.run_batch": (QUEUE_INGEST, 8),
+}
+
+celery_app.conf.update(
+    task_queues=[Queue(QUEUE_INGEST), Queue(QUEUE_INTERACTIVE)],
+    task_routes={name: {"queue": queue} for name, (queue, _) in ROUTES.items()},
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": PRIORITY_SEP,
+        "queue_order_strategy": "priority",
+    },
+    # Long ingest jobs must not sit prefetched behind a busy worker process.
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    result_expires=JOB_TTL,
+    result_compression="zlib",
+)
+
+# Upper bound on a claim, in case a worker dies without releasing it.
+INFLIGHT_TTL: int = int(os.getenv("INFLIGHT_TTL", "3600"))
+
+TOKEN_STREAM_TTL: int = int(os.getenv("TOKEN_STREAM_TTL", "3600"))
+TOKEN_STREAM_MAXLEN = 20_000
+
+_local = threading.local()
+
 
 def _get_event_loop() -> asyncio.AbstractEventLoop:
-    """Create (and set) a fresh event loop for this worker process."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    """Return this worker thread's long‑lived event loop, creating it on first use."""
+    loop = getattr(_local, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _local.loop = loop
     return loop
 
 
+@worker_process_init.connect
+def _init_worker(**_):
+    """Create the loop and warm shared resources before the first task arrives."""
+    _get_event_loop()
+    resources.warm()
+
+
+@worker_process_shutdown.connect
+def _shutdown_worker(**_):
+    loop = getattr(_local, "loop", None)
+    if loop is not None and not loop.is_closed():
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def async_task(name: str, **options):
+    """
+    Register an ``async def fn(job_id, ...)`` as a Celery task run on the
+    persistent loop, on the queue / priority ``ROUTES`` gives it. The job is
+    marked RUNNING (with its queue wait time) before ``fn`` starts.
+    """
+    queue, priority = ROUTES[name]
+
+    def decorator(fn):
+        @celery_app.task(name=name, priority=priority, **options)
+        @functools.wraps(fn)
+        def wrapper(job_id: str, *args, **kwargs):
+            with metrics.track() as m:
+                try:
+                    _mark_running(job_id, queue)
+                    with metrics.stage(name):
+                        return _get_event_loop().run_until_complete(fn(job_id, *args, **kwargs))
+                finally:
+                    release_flight(job_id)
+                    _flush_metrics(m)
+        return wrapper
+    return decorator
+
+
+def inflight_key(task_name: str, *params) -> str:
+    """Single‑flight key of a request; ``params`` must already be normalised."""
+    raw = json.dumps([task_name, *params], sort_keys=True, default=str)
+    return f"inflight:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+# Delete the claim only if it still belongs to this job.
+_release_script = r.register_script(
+    "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+)
+
+
+def release_claim(key: str, job_id: str):
+    _release_script(keys=[key], args=[job_id])
+
+
+def release_flight(job_id: str):
+    key = r.hget(job_key(job_id), "inflight_key")
+    if key:
+        release_claim(key, job_id)
+
+
+def queue_keys(queue: str) -> list[str]:
+    """Broker lists holding ``queue``'s messages, one per priority step."""
+    return [queue] + [f"{queue}{PRIORITY_SEP}{p}" for p in PRIORITY_STEPS[1:]]
+
+
+def queue_depths() -> dict[str, int]:
+    """Messages waiting in each queue (not yet taken by a worker)."""
+    pipe = r.pipeline(transaction=False)
+    queues = (QUEUE_INGEST, QUEUE_INTERACTIVE)
+    for queue in queues:
+        for key in queue_keys(queue):
+            pipe.llen(key)
+    counts = iter(pipe.execute())
+    return {q: sum(next(counts) for _ in queue_keys(q)) for q in queues}
+
+
+def _flush_metrics(m: metrics.JobMetrics):
+    """Add one job's latencies and counters to the shared Redis aggregates."""
+    pipe = r.pipeline(transaction=False)
+    for name, seconds in m.seconds.items():
+        key = metrics.stage_key(name)
+        pipe.sadd(metrics.STAGES_KEY, name)
+        pipe.hincrbyfloat(key, "sum", seconds)
+        pipe.hincrby(key, "count", m.calls[name])
+        for bucket, n in m.buckets[name].items():
+            pipe.hincrby(key, bucket, n)
+    for name, n in m.counters.items():
+        pipe.hincrbyfloat(metrics.COUNTERS_KEY, name, n)
+    pipe.execute()
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def result_key(job_id: str) -> str:
+    return f"job:{job_id}:result"
+
+
+def events_channel(job_id: str) -> str:
+    return f"job:{job_id}:events"
+
+
+def pack_result(result: dict) -> bytes:
+    return zlib.compress(json.dumps(result, separators=(",", ":")).encode(), 6)
+
+
+def unpack_result(blob: bytes | None) -> dict | None:
+    return json.loads(zlib.decompress(blob)) if blob else None
+
+
+def load_result(job_id: str) -> dict | None:
+    return unpack_result(rb.get(result_key(job_id)))
+
+
 def _mark_status(job_id: str, **fields):
-    """Convenience wrapper to update job hash in Redis."""
-    r.hset(job_id, mapping=fields)
+    """Convenience wrapper to update job hash in Redis and notify subscribers."""
+    m = metrics.current()
+    if m is not None and fields.get("status") in ("DONE", "ERROR"):
+        fields["metrics"] = json.dumps(m.summary())
+    with metrics.stage("redis"):
+        pipe = r.pipeline(transaction=False)
+        pipe.hset(job_key(job_id), mapping=fields)
+        pipe.expire(job_key(job_id), JOB_TTL)
+        pipe.publish(events_channel(job_id), json.dumps(fields))
+        pipe.execute()
+
+
+def _finish(job_id: str, result: dict):
+    """Store the compressed result, then flip the job to DONE."""
+    blob = pack_result(result)
+    with metrics.stage("redis"):
+        rb.set(result_key(job_id), blob, ex=JOB_TTL)
+    _mark_status(job_id, status="DONE", result_bytes=len(blob))
 
-@celery_app.task(name="jobs.run_limitation")
-def run_limitation(job_id: str, prompt: str):
+
+def _mark_running(job_id: str, queue: str):
+    """Mark a job RUNNING and record how long it sat in ``queue``."""
+    queued_at = r.hget(job_key(job_id), "queued_at")
+    fields = {"status": "RUNNING", "queue": queue}
+    if queued_at:
+        wait = max(0.0, time.time() - float(queued_at))
+        metrics.current().observe(f"queue_wait:{queue}", wait)
+        fields["wait_s"] = f"{wait:.3f}"
+    _mark_status(job_id, **fields)
+
+
+def _progress(job_id: str):
+    """Callback handed to the runners to report the current stage."""
+    return lambda stage: _mark_status(job_id, stage=stage)
+
+
+def tokens_stream(job_id: str) -> str:
+    return f"job:{job_id}:tokens"
+
+
+def _publish_token(job_id: str, **entry):
+    key = tokens_stream(job_id)
+    pipe = r.pipeline(transaction=False)
+    pipe.xadd(key, entry, maxlen=TOKEN_STREAM_MAXLEN, approximate=True)
+    pipe.expire(key, TOKEN_STREAM_TTL)
+    with metrics.stage("redis"):
+        pipe.execute()
+
+
+def _token_sink(job_id: str):
+    """Callback handed to the runners; receives (field, chunk) per streamed token."""
+    def sink(field: str, chunk: str):
+        metrics.count("streamed_chunks")
+        _publish_token(job_id, field=field, token=chunk)
+    return sink
+
+
+def _end_tokens(job_id: str):
+    _publish_token(job_id, event="end")
+
+
+def _session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def _save_session(session_id: str, pdf_paths: list[str], ideas: str):
+    """Persist what a worker needs to rebuild an evicted session (not the Docs)."""
+    key = _session_key(session_id)
+    r.hset(key, mapping={"pdf_paths": json.dumps(pdf_paths), "ideas": ideas})
+    r.expire(key, SESSION_TTL)
+
+@async_task("jobs.run_limitation")
+async def run_limitation(job_id: str, prompt: str, sections_only: bool = False):
     """Generate the *Limitations* section for a paper."""
-    _mark_status(job_id, status="RUNNING")
+    try:
+        result = await limitation_runner.run(
+            prompt,
+            sections_only=sections_only,
+            progress=_progress(job_id),
+            on_token=_token_sink(job_id),
+        )
+    except Exception as e:
+        _mark_status(job_id, status="ERROR", error=str(e))
+        raise
+    else:
+        _finish(job_id, result)
+        return result
+    finally:
+        _end_tokens(job_id)
+
 
-    loop = _get_event_loop()
+@async_task("jobs.run_batch")
+async def run_batch(job_id: str, prompts: list[str], sections_only: bool = False):
+    """Answer several topics in one job over a shared, de‑duplicated paper pool."""
     try:
-        result = loop.run_until_complete(limitation_runner.run(prompt))
-    except Exception as e: 
+        result = await limitation_runner.run_batch(
+            prompts,
+            sections_only=sections_only,
+            progress=_progress(job_id),
+            on_token=_token_sink(job_id),
+        )
+    except Exception as e:
         _mark_status(job_id, status="ERROR", error=str(e))
         raise
     else:
-        _mark_status(job_id, status="DONE", result=json.dumps(result))
-        return result 
+        _finish(job_id, result)
+        return result
+    finally:
+        _end_tokens(job_id)
+
 
+def limitation_context(limitation_job_id: str, pdf_paths: str | list[str]) -> str:
+    """JSON analysis of the paper(s) ``pdf_paths`` from a finished limitation / batch job."""
+    result = load_result(limitation_job_id)
+    if result is None:
+        raise KeyError(f"Limitation job {limitation_job_id} not found or not finished")
+    context: dict = {}
+    for pdf_path in [pdf_paths] if isinstance(pdf_paths, str) else pdf_paths:
+        answers = limitation_runner.context_for(result, pdf_path)
+        if answers is None:
+            raise ValueError(f"{pdf_path} is not a paper of job {limitation_job_id}")
+        context.update(answers)
+    return json.dumps(context, indent=2)
 
-@celery_app.task(name="jobs.run_future_work")
-def run_future_work(
+
+@async_task("jobs.run_future_work")
+async def run_future_work(
     job_id: str,
-    pipeline_json: str,
-    pdf_path: str,
+    limitation_job_id: str,
+    pdf_paths: str | list[str],
     choice: str | None,
     generate_code: bool,
 ):
-    """Generate *Future Work* suggestions (and optional code) for a paper."""
-    _mark_status(job_id, status="RUNNING")
-
-    loop = _get_event_loop()
+    """
+    Generate *Future Work* suggestions (and optional code) for a paper, or
+    one merged, source‑cited list for several papers.
+    """
+    pdf_paths = [pdf_paths] if isinstance(pdf_paths, str) else pdf_paths
     try:
-        result = loop.run_until_complete(
-            future_work_runner.run(
-                pipeline_json=pipeline_json,
-                pdf_path=pdf_path,
-                choice=choice,
-                generate_code=generate_code,
-            )
+        result = await future_work_runner.run(
+            context_json=limitation_context(limitation_job_id, pdf_paths),
+            pdf_path=pdf_paths,
+            choice=choice,
+            generate_code=generate_code,
+            session_id=job_id,
+            progress=_progress(job_id),
+            on_token=_token_sink(job_id),
         )
     except Exception as e:
         _mark_status(job_id, status="ERROR", error=str(e))
         raise
     else:
-        _mark_status(job_id, status="DONE", result=json.dumps(result))
+        _save_session(job_id, pdf_paths, result["ideas"])
+        _finish(job_id, result)
+        return result
+    finally:
+        _end_tokens(job_id)
+
+
+async def _continue(job_id: str, session_id: str, choice: str, generate_code: bool) -> dict:
+    progress = _progress(job_id)
+    session = sessions.get(session_id)
+    if session is None:
+        saved = r.hgetall(_session_key(session_id))
+        if not saved:
+            raise KeyError(f"Session {session_id} not found or expired")
+        progress("embedding")
+        pdf_paths = json.loads(saved["pdf_paths"])
+        session = await future_work_runner.resume_session(session_id, pdf_paths, saved["ideas"])
+    r.expire(_session_key(session_id), SESSION_TTL)
+    answers = await future_work_runner.continue_session(
+        session,
+        choice,
+        generate_code,
+        progress=progress,
+        on_token=_token_sink(job_id),
+    )
+    return {**answers, "session_id": session_id}
+
+
+@async_task("jobs.run_future_followup")
+async def run_future_followup(
+    job_id: str,
+    session_id: str,
+    choice: str,
+    generate_code: bool,
+):
+    """Expand an idea from an existing future‑work session (warm Docs)."""
+    try:
+        result = await _continue(job_id, session_id, choice, generate_code)
+    except Exception as e:
+        _mark_status(job_id, status="ERROR", error=str(e))
+        raise
+    else:
+        _finish(job_id, result)
         return result
+    finally:
+        _end_tokens(job_id)
@@ -0,0 +1,55 @@
+"""
+Benchmark ``limitation_runner._analyze`` stage timings vs. concurrency.
+
+Uses ``bench.fakes.FakeDocs`` (sleep‑based embedding / LLM latency) and
+throwaway index / answer caches, so it needs no network or API keys:
+
+    python -m bench.bench_analyze --papers 10 --questions 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+from backend.pipeline import answer_cache, index_cache, limitation_runner
+from bench.fakes import FakeDocs
+
+
+def _make_papers(root: Path, n: int) -> list[str]:
+    paths = []
+    for i in range(n):
+        p = root / f"paper{i:03d}.pdf"
+        p.write_bytes(os.urandom(1024))
+        paths.append(str(p))
+    return paths
+
+
+async def _bench(papers: int, questions: int, levels: list[int]):
+    limitation_runner.Docs = index_cache.Docs = FakeDocs
+    qs = [f"Question {i}?" for i in range(questions)]
+
+    print(f"{'concurrency':>11} {'ingest_s':>9} {'query_s':>8}")
+    for level in levels:
+        with tempfile.TemporaryDirectory() as tmp:
+            index_cache._cache = index_cache.IndexCache(Path(tmp) / "index")
+            answer_cache._cache = answer_cache.AnswerCache(Path(tmp) / "answers")
+            paths = _make_papers(Path(tmp), papers)
+            _, timings, _ = await limitation_runner._analyze(paths, qs, concurrency=level)
+        print(f"{level:>11} {timings['ingest']:>9.3f} {timings['query']:>8.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers", type=int, default=10)
+    ap.add_argument("--questions", type=int, default=4)
+    ap.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = ap.parse_args()
+    asyncio.run(_bench(args.papers, args.questions, args.levels))
+
+
+if __name__ == "__main__":
+    main()
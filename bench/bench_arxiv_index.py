@@ -0,0 +1,143 @@
+"""
+Build and query the local arXiv metadata index on a synthetic corpus.
+
+Records get Zipf‑distributed filler words plus topic phrases ("machine
+learning", "graph neural network", ...) at realistic rates, random authors,
+categories and submission dates from 1992 on, so phrase, category, author,
+NOT and date clauses all select a non‑trivial share of the corpus. Reports
+the build rate, database size and per‑prompt latency of the FTS5 search the
+``optimize_query`` plan turns into. Newest‑first searches stop after
+``--want`` matches; relevance order scores every match, so it grows with
+how common the phrase is:
+
+    python -m bench.bench_arxiv_index --records 1000000
+    python -m bench.bench_arxiv_index --db /tmp/idx.sqlite --keep   # reuse a build
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+
+# (prompt, sort override); "relevance" exercises the bm25 ranking
+PROMPTS = [
+    ("machine learning papers", None),
+    ("machine learning papers", "relevance"),
+    ("recent graph neural network papers", None),
+    ("reinforcement learning from 2019 to 2020", None),
+    ("evaluation of large language model papers", None),
+    ("quantum computing error correction", "relevance"),
+    ("diffusion model papers since 2023", None),
+]
+
+TOPICS = [
+    ("machine learning", 0.12),
+    ("graph neural network", 0.03),
+    ("reinforcement learning", 0.04),
+    ("large language model", 0.04),
+    ("quantum computing", 0.02),
+    ("error correction", 0.02),
+    ("diffusion model", 0.02),
+    ("protein design", 0.005),
+    ("evaluation", 0.08),
+]
+CATEGORIES = ["cs.LG", "cs.CL", "cs.AI", "cs.CV", "stat.ML", "quant-ph", "hep-ph", "math.AT",
+              "astro-ph", "cond-mat", "q-bio.BM", "math.GN"]
+FIRST = ["Alice", "Bob", "Carol", "Dmitri", "Eun", "Farah", "Gabriel", "Hiro", "Ines", "Jun"]
+LAST = ["Zhang", "Smith", "Garcia", "Kim", "Ivanova", "Okafor", "Rossi", "Tanaka", "Nguyen", "Weber"]
+
+
+def _vocab(rng: random.Random, size: int = 20_000) -> tuple[list[str], list[float]]:
+    syllables = ["ka", "lo", "mi", "ne", "ra", "ti", "zu", "por", "ven", "sel", "tra", "qu", "ex"]
+    words = sorted({"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(size)})
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+
+def _records(n: int, seed: int):
+    rng = random.Random(seed)
+    words, weights = _vocab(rng)
+    cum = list(accumulate(weights))
+    start = time.mktime((1992, 1, 1, 0, 0, 0, 0, 0, -1))
+    span = time.time() - start
+    for i in range(n):
+        title = rng.choices(words, cum_weights=cum, k=rng.randint(6, 12))
+        abstract = rng.choices(words, cum_weights=cum, k=rng.randint(60, 120))
+        for phrase, p in TOPICS:
+            if rng.random() < p:
+                title.insert(rng.randrange(len(title) + 1), phrase)
+            if rng.random() < 2 * p:
+                abstract.insert(rng.randrange(len(abstract) + 1), phrase)
+        day = time.strftime("%Y-%m-%d", time.gmtime(start + rng.random() * span))
+        yield {
+            "arxiv_id": f"{day[2:4]}{day[5:7]}.{i:07d}",
+            "title": " ".join(title).capitalize(),
+            "abstract": " ".join(abstract).capitalize() + ".",
+            "authors": ", ".join(f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+                                 for _ in range(rng.randint(1, 6))),
+            "categories": " ".join(rng.sample(CATEGORIES, rng.randint(1, 3))),
+            "published": day,
+            "updated": day,
+        }
+
+
+def _percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--records", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=50, help="timed runs per prompt")
+    ap.add_argument("--want", type=int, default=10, help="max_results per search")
+    ap.add_argument("--db", help="index file (default: a temp file)")
+    ap.add_argument("--keep", action="store_true", help="reuse --db if it is already built")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    os.environ.setdefault("OPTIMIZE_ARXIV_NLP", "fallback")
+    from arxiv_index import ArxivIndex
+    from optimize_arxiv import optimize_query
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(args.db or Path(tmp) / "arxiv_index.sqlite")
+        if db.exists() and not args.keep:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{db}{suffix}").unlink(missing_ok=True)
+        index = ArxivIndex(str(db))
+        if not index.count():
+            t0 = time.perf_counter()
+            n = index.bulk_load(_records(args.records, args.seed))
+            build_s = time.perf_counter() - t0
+            print(f"built {n} records in {build_s:.1f} s ({n / build_s:,.0f} rec/s, "
+                  f"synthetic generation included)")
+        index._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"index: {index.count()} records, {db.stat().st_size / 1024**2:,.0f} MiB\n")
+
+        print(f"{'prompt':<44} {'sort':<9} {'hits':>4} {'cold_ms':>8} {'p50_ms':>7} {'p95_ms':>7}")
+        for prompt, sort in PROMPTS:
+            query, filters = optimize_query(prompt)
+            filters["max_results"] = args.want
+            if sort:
+                filters["sort"] = sort
+            t0 = time.perf_counter()
+            papers = index.search(query, filters)
+            cold = time.perf_counter() - t0
+            lat = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                index.search(query, filters)
+                lat.append(time.perf_counter() - t0)
+            hits = "n/a" if papers is None else len(papers)
+            print(f"{prompt[:44]:<44} {sort or 'date':<9} {hits:>4} {cold * 1e3:>8.1f} "
+                  f"{_percentile(lat, 50) * 1e3:>7.1f} {_percentile(lat, 95) * 1e3:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Count arXiv API pages and qualifying papers per search, old vs. new.
+
+Runs against ``bench.stub_arxiv`` with entries spread newest‑first over a
+range of years. "legacy" is the old behaviour – one fixed ``max_results=10``
+request, years filtered on the client afterwards; "lazy" is
+``optimize_arxiv.search_arxiv`` with the ``submittedDate`` clause in the query
+and paging that stops at ``--want`` papers:
+
+    python -m bench.bench_arxiv_search --entries 2000 --want 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import time
+
+from bench.stub_arxiv import StubArxiv
+
+PROMPTS = [
+    "machine learning papers",
+    "recent machine learning papers",
+    "machine learning papers from 2019 to 2020",
+    "machine learning papers before 2016",
+]
+
+
+def _legacy(query: str, filters: dict) -> list:
+    import arxiv
+
+    from optimize_arxiv import _client
+
+    query = re.sub(r"\s*AND submittedDate:\[[^\]]*\]", "", query)
+    search = arxiv.Search(query=query or "all:", max_results=10, sort_by=filters["sort"])
+    results = []
+    for r in _client(10).results(search):
+        year = r.published.year
+        if filters["min_year"] and year < filters["min_year"]:
+            continue
+        if filters["max_year"] and year > filters["max_year"]:
+            continue
+        results.append(r)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=2000)
+    ap.add_argument("--want", type=int, default=5)
+    args = ap.parse_args()
+
+    years = tuple(range(2015, time.gmtime().tm_year + 1))
+    with StubArxiv(["sample_paper/ART20203995.pdf"], entries=args.entries, years=years) as stub:
+        os.environ["ARXIV_API_URL"] = stub.api_url
+        os.environ.setdefault("OPTIMIZE_ARXIV_NLP", "fallback")
+        import optimize_arxiv
+
+        print(f"{'prompt':<44} {'mode':<7} {'papers':>6} {'pages':>5} {'secs':>6}")
+        for prompt in PROMPTS:
+            query, filters = optimize_arxiv.optimize_query(prompt)
+            filters["max_results"] = args.want
+            for mode, fn in (("legacy", _legacy), ("lazy", optimize_arxiv._search_arxiv_live)):
+                before = stub.requests["query"]
+                t0 = time.perf_counter()
+                papers = fn(query, filters)
+                secs = time.perf_counter() - t0
+                pages = stub.requests["query"] - before
+                print(f"{prompt[:44]:<44} {mode:<7} {len(papers):>6} {pages:>5} {secs:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark batch research‑gap mode against running each topic on its own.
+
+Topics draw overlapping paper sets from a small synthetic pool; arXiv search
+and PDF downloads are replaced by local fakes and ``FakeDocs`` stands in for
+PaperQA, so it needs no network or API keys:
+
+    python -m bench.bench_batch --topics 24 --pool 40 --per-topic 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from backend.pipeline import answer_cache, index_cache, limitation_runner
+from bench.fakes import FakeDocs
+
+
+def _fresh_caches(root: Path):
+    index_cache._cache = index_cache.IndexCache(root / "index")
+    answer_cache._cache = answer_cache.AnswerCache(root / "answers")
+
+
+def _install_fakes(root: Path, pool: int, per_topic: int, seed: int) -> dict:
+    """Patch search / download so each prompt maps to a fixed random paper subset."""
+    rng = random.Random(seed)
+    papers = root / "papers"
+    papers.mkdir()
+    ids = [f"2401.{i:05d}" for i in range(pool)]
+    for arxiv_id in ids:
+        (papers / f"{arxiv_id}.pdf").write_bytes(os.urandom(1024))
+    subsets: dict[str, list[str]] = {}
+    counters = {"downloads": 0}
+
+    def search(query, filters):
+        chosen = subsets.setdefault(query, rng.sample(ids, per_topic))
+        return [{"url": f"http://arxiv.org/abs/{i}"} for i in chosen]
+
+    def download(urls, on_done=None, **_):
+        counters["downloads"] += len(urls)
+        return [str(papers / f"{u.rsplit('/', 1)[-1]}.pdf") for u in urls]
+
+    limitation_runner.Docs = index_cache.Docs = FakeDocs
+    limitation_runner.search_arxiv = search
+    limitation_runner.download_pdfs = download
+    limitation_runner.optimize_query = lambda p: (p, {})
+    limitation_runner.optimize_queries = lambda ps: [(p, {}) for p in ps]
+    return counters
+
+
+async def _bench(topics: int, pool: int, per_topic: int, seed: int):
+    prompts = [f"topic {i}" for i in range(topics)]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        counters = _install_fakes(root, pool, per_topic, seed)
+
+        _fresh_caches(root / "one")
+        t0 = time.perf_counter()
+        for p in prompts:
+            await limitation_runner.run(p, max_results=per_topic)
+        single_s = time.perf_counter() - t0
+        single_downloads = counters["downloads"]
+
+        counters["downloads"] = 0
+        _fresh_caches(root / "batch")
+        t0 = time.perf_counter()
+        result = await limitation_runner.run_batch(prompts, max_results=per_topic)
+        batch_s = time.perf_counter() - t0
+
+    totals = result["totals"]
+    print(f"one job per topic : {single_s:7.2f} s, {single_downloads} download requests")
+    print(f"batch job         : {batch_s:7.2f} s, {counters['downloads']} download requests")
+    for k, v in totals.items():
+        print(f"  {k:<18} {v}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--topics", type=int, default=24)
+    ap.add_argument("--pool", type=int, default=40)
+    ap.add_argument("--per-topic", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    asyncio.run(_bench(args.topics, args.pool, args.per_topic, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Offline end‑to‑end benchmark of the limitation → future‑work flow.
+
+Everything external is replaced by a local stand‑in, so it runs on a plain
+Linux box without network access or API keys:
+
+• arXiv search and PDF downloads go over HTTP to ``bench.stub_arxiv``, which
+  serves the PDFs in ``sample_paper/`` and ``sample_output/``,
+• PaperQA runs for real (parsing, chunking, retrieval) with the mock LLMs and
+  local sparse embeddings from ``bench.fakes.fake_settings``,
+• all caches and papers live in a throwaway directory.
+
+Each flow is one ``limitation_runner.run`` followed by
+``future_work_runner.run`` (ideas → project → code) on its first paper.
+Stage latencies come from ``backend.pipeline.metrics``; a sampler thread
+tracks this process's RSS so each stage reports the peak RSS seen while it
+ran (set ``PDF_WORKERS=1`` to keep PDF extraction in‑process):
+
+    python -m bench.bench_e2e --flows 8 --concurrency 2
+    python -m bench.bench_e2e --flows 8 --warm      # keep caches between rounds
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from backend.pipeline import metrics
+from bench.stub_arxiv import StubArxiv
+
+DEFAULT_PDFS = ["sample_paper/*.pdf", "sample_output/*.pdf"]
+
+
+def _rss_mib() -> float:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024**2 if sys.platform == "darwin" else 1024)
+
+
+class _RssSampler(threading.Thread):
+    def __init__(self, interval: float = 0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: list[tuple[float, float]] = []
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.samples.append((time.perf_counter(), _rss_mib()))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def peak(self, intervals: list[tuple[float, float]]) -> float:
+        return max(
+            (rss for t, rss in self.samples for a, b in intervals if a <= t <= b),
+            default=0.0,
+        )
+
+
+@dataclass
+class SampledMetrics(metrics.JobMetrics):
+    """``JobMetrics`` that also keeps each call's (start, end) for percentiles / RSS."""
+
+    intervals: dict[str, list[tuple[float, float]]] = field(default_factory=dict)
+
+    def observe(self, name: str, seconds: float) -> None:
+        super().observe(name, seconds)
+        end = time.perf_counter()
+        self.intervals.setdefault(name, []).append((end - seconds, end))
+
+
+def _environment(root: Path, stub: StubArxiv) -> None:
+    """Point downloads at the stub and every cache / output directory at ``root``."""
+    os.environ.setdefault("OPTIMIZE_ARXIV_NLP", "fallback")
+    os.environ["ARXIV_PDF_BASE"] = stub.pdf_base
+    os.environ["ARXIV_API_URL"] = stub.api_url
+    for var, sub in (
+        ("PAPERS_DIR", "papers"),
+        ("INDEX_CACHE_DIR", "index"),
+        ("ANSWER_CACHE_DIR", "answers"),
+        ("PAGE_CACHE_DIR", "pages"),
+    ):
+        os.environ[var] = str(root / sub)
+
+
+def _reset_caches(root: Path) -> None:
+    """Forget everything a previous round downloaded, parsed or answered."""
+    import optimize_arxiv
+    from backend.pipeline import answer_cache, index_cache
+
+    for sub in ("papers", "index", "answers", "pages"):
+        shutil.rmtree(root / sub, ignore_errors=True)
+        (root / sub).mkdir(parents=True)
+    index_cache._cache = None
+    answer_cache._cache = None
+    optimize_arxiv._plan_cache.clear()
+    optimize_arxiv._search_cache.clear()
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def _bench(args, root: Path, stub: StubArxiv):
+    # Imported late: module‑level settings read the environment set up in main().
+    from backend.pipeline import future_work_runner, limitation_runner, resources
+    from bench.fakes import fake_settings
+
+    settings = fake_settings()
+    for module in (resources, limitation_runner, future_work_runner):
+        module.get_settings = lambda llm=None: settings
+
+    async def _flow(i: int) -> SampledMetrics:
+        m = SampledMetrics()
+        with metrics.track(m):
+            with metrics.stage("limitation"):
+                result = await limitation_runner.run(
+                    f"future work in machine learning {i}",
+                    max_results=args.papers,
+                )
+            pdf = result["pdf_paths"][0]
+            context = json.dumps(limitation_runner.context_for(result, pdf))
+            with metrics.stage("future_work"):
+                await future_work_runner.run(context, pdf, choice="1", generate_code=True)
+        return m
+
+    sampler = _RssSampler()
+    sampler.start()
+    runs: list[SampledMetrics] = []
+    t0 = time.perf_counter()
+    for start in range(0, args.flows, args.concurrency):
+        if not args.warm:
+            _reset_caches(root)
+        batch = range(start, min(start + args.concurrency, args.flows))
+        runs += await asyncio.gather(*(_flow(i) for i in batch))
+    wall = time.perf_counter() - t0
+    sampler.stop()
+    requests = dict(stub.requests)
+
+    stages = sorted({name for m in runs for name in m.intervals})
+    print(
+        f"{'stage':<16} {'calls':>6} {'calls/s':>8} {'p50_s':>8} {'p95_s':>8} "
+        f"{'max_s':>8} {'peak_rss_MiB':>12}"
+    )
+    for name in stages:
+        intervals = [iv for m in runs for iv in m.intervals.get(name, [])]
+        lat = sorted(b - a for a, b in intervals)
+        print(
+            f"{name:<16} {len(lat):>6} {len(lat) / wall:>8.2f} {_percentile(lat, 50):>8.3f} "
+            f"{_percentile(lat, 95):>8.3f} {lat[-1]:>8.3f} {sampler.peak(intervals):>12.1f}"
+        )
+
+    print(f"\nflows: {args.flows} in {wall:.2f} s ({60 * args.flows / wall:.1f} flows/min)")
+    print(f"stub requests: {requests}")
+    hits = [m.summary()["cache"] for m in runs]
+    for cache in ("index", "answer"):
+        h = sum(c[cache]["hits"] for c in hits)
+        n = h + sum(c[cache]["misses"] for c in hits)
+        print(f"{cache} cache hit ratio: {h / n if n else 0.0:.2f} ({h}/{n})")
+    print(f"peak RSS overall: {max(rss for _, rss in sampler.samples):.1f} MiB")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pdfs", nargs="*", default=DEFAULT_PDFS)
+    ap.add_argument("--flows", type=int, default=4)
+    ap.add_argument("--concurrency", type=int, default=1, help="flows run at once per round")
+    ap.add_argument("--papers", type=int, default=2, help="arXiv results per limitation run")
+    ap.add_argument("--warm", action="store_true", help="keep caches between rounds")
+    args = ap.parse_args()
+
+    pdfs = sorted({p for pattern in args.pdfs for p in glob.glob(pattern)})
+    if not pdfs:
+        ap.error("no PDFs found")
+    with tempfile.TemporaryDirectory() as tmp, StubArxiv(pdfs) as stub:
+        root = Path(tmp)
+        _environment(root, stub)
+        _reset_caches(root)
+        asyncio.run(_bench(args, root, stub))
+
+
+if __name__ == "__main__":
+    main()
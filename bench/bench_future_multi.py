@@ -0,0 +1,75 @@
+"""
+Benchmark multi‑paper (map‑reduce) future‑work extraction.
+
+Uses ``bench.fakes.FakeDocs`` (sleep‑based embedding / LLM latency), the
+offline ``fake_settings`` (local sparse embeddings for the idea merge) and
+throwaway index / answer caches, so it needs no network or API keys. Runs
+the map‑reduce over ``--papers`` papers cold, again unchanged, and once more
+with one paper added, reporting wall time and how many per‑paper LLM
+queries / embeddings each pass actually ran:
+
+    python -m bench.bench_future_multi --papers 12 --concurrency 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from backend.pipeline import answer_cache, future_work_runner, index_cache, metrics
+from bench.fakes import FakeDocs, fake_settings
+
+
+def _make_papers(root: Path, n: int) -> list[str]:
+    paths = []
+    for i in range(n):
+        p = root / f"2401.{i:05d}.pdf"
+        p.write_bytes(os.urandom(1024))
+        paths.append(str(p))
+    return paths
+
+
+async def _bench(papers: int, concurrency: int):
+    future_work_runner.Docs = index_cache.Docs = FakeDocs
+    settings = fake_settings()
+    future_work_runner.get_settings = lambda llm=None: settings
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        index_cache._cache = index_cache.IndexCache(root / "index")
+        answer_cache._cache = answer_cache.AnswerCache(root / "answers")
+        paths = _make_papers(root, papers + 1)
+
+        print(f"{'pass':<16} {'papers':>6} {'wall_s':>7} {'queries':>7} {'embedded':>8} {'ideas':>5}")
+        for label, subset in (
+            ("cold", paths[:papers]),
+            ("unchanged", paths[:papers]),
+            ("one paper added", paths),
+        ):
+            with metrics.track() as m:
+                t0 = time.perf_counter()
+                result = await future_work_runner.extract_ideas(
+                    '{"question": "future work"}', subset, concurrency=concurrency
+                )
+                wall = time.perf_counter() - t0
+            print(
+                f"{label:<16} {len(subset):>6} {wall:>7.2f} {m.calls.get('query', 0):>7} "
+                f"{int(m.counters.get('index_cache_miss', 0)):>8} {len(result['ranked']):>5}"
+            )
+        print("\nmerged list (top 3):")
+        print("\n".join(result["ideas"].splitlines()[:3]))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--papers", type=int, default=12)
+    ap.add_argument("--concurrency", type=int, default=4)
+    args = ap.parse_args()
+    asyncio.run(_bench(args.papers, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
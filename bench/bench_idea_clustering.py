@@ -0,0 +1,109 @@
+"""
+Benchmark idea de‑duplication / clustering on thousands of bullets.
+
+Bullets are synthetic paraphrases of ``--topics`` ideas spread over several
+"papers"; a stand‑in embedding model maps each bullet to its topic's
+centroid plus noise (cosine ≈ 0.9 within a topic, ≈ 0 across), so no
+network or API keys are needed. Reports the wall time of the whole
+``ideas.merge`` (parse, batched embedding, clustering, ranking) and of the
+blockwise similarity + clustering alone, and how many clusters were found:
+
+    python -m bench.bench_idea_clustering --bullets 1000 2000 5000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import time
+
+import numpy as np
+
+from backend.pipeline import ideas
+
+VERBS = ["Extend", "Evaluate", "Study", "Apply", "Scale", "Analyse", "Generalise", "Test"]
+
+
+class _TopicEmbeddings:
+    """``embed_documents`` returning topic centroid + per‑text noise."""
+
+    def __init__(self, topics: int, dim: int, noise: float, seed: int):
+        rng = np.random.default_rng(seed)
+        c = rng.standard_normal((topics, dim)).astype(np.float32)
+        self.centroids = c / np.linalg.norm(c, axis=1, keepdims=True)
+        self.dim = dim
+        self.noise = noise
+        self.calls = 0
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        out = []
+        for t in texts:
+            topic = int(t.rsplit("#", 1)[1].split()[0])
+            seed = int.from_bytes(hashlib.sha256(t.encode()).digest()[:8], "little")
+            g = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            out.append(self.centroids[topic] + self.noise * g / np.sqrt(self.dim))
+        return out
+
+
+class _Settings:
+    def __init__(self, model):
+        self.model = model
+
+    def get_embedding_model(self):
+        return self.model
+
+
+def _answers(bullets: int, topics: int, papers: int, seed: int) -> dict[str, str]:
+    """``papers`` numbered lists holding ``bullets`` paraphrases in total."""
+    rng = np.random.default_rng(seed)
+    lists: dict[str, list[str]] = {f"2401.{p:05d}": [] for p in range(papers)}
+    names = list(lists)
+    for _ in range(bullets):
+        topic = int(rng.integers(topics))
+        verb = VERBS[int(rng.integers(len(VERBS)))]
+        text = f"{verb} the approach to open problem #{topic} variant {int(rng.integers(4))}"
+        lists[names[int(rng.integers(papers))]].append(text)
+    return {
+        name: "\n".join(f"{i}. {b}" for i, b in enumerate(items, 1))
+        for name, items in lists.items()
+    }
+
+
+async def _bench(sizes: list[int], topics: int, papers: int, dim: int, seed: int):
+    print(f"{'bullets':>8} {'unique':>7} {'merge_s':>8} {'cluster_s':>9} {'clusters':>8} "
+          f"{'topics':>6} {'embed_calls':>11}")
+    for n in sizes:
+        model = _TopicEmbeddings(topics, dim, noise=0.35, seed=seed)
+        answers = _answers(n, topics, papers, seed)
+        t0 = time.perf_counter()
+        ranked = await ideas.merge(answers, _Settings(model), context="open problem #1")
+        merge_s = time.perf_counter() - t0
+
+        items = ideas.parse_items(answers)
+        unique = list(dict.fromkeys(it.text for it in items))
+        vectors = await ideas.embed(unique, _Settings(model))
+        t0 = time.perf_counter()
+        ideas.cluster(vectors, list(range(len(vectors))))
+        cluster_s = time.perf_counter() - t0
+        true_topics = len({t.rsplit("#", 1)[1].split()[0] for t in unique})
+        print(f"{n:>8} {len(unique):>7} {merge_s:>8.3f} {cluster_s:>9.3f} {len(ranked):>8} "
+              f"{true_topics:>6} {model.calls:>11}")
+    print("\ntop of the last list:")
+    print(ideas.render(ranked[:3]))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bullets", type=int, nargs="+", default=[1000, 2000, 5000, 10000])
+    ap.add_argument("--topics", type=int, default=200)
+    ap.add_argument("--papers", type=int, default=50)
+    ap.add_argument("--dim", type=int, default=1536, help="embedding width")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    asyncio.run(_bench(args.bullets, args.topics, args.papers, args.dim, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Import‑time / memory benchmark for API and worker cold starts.
+
+Each target is imported in a fresh interpreter; wall time and peak RSS of
+that child are reported. ``optimize_arxiv+nlp`` forces the spaCy load that
+used to happen at import time, for comparison:
+
+    python -m bench.bench_import --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+TARGETS = {
+    "optimize_arxiv": "import optimize_arxiv",
+    "optimize_arxiv+nlp": "import optimize_arxiv; optimize_arxiv.get_nlp()",
+    "backend.app.main": "import backend.app.main",
+    "backend.workers.tasks": "import backend.workers.tasks",
+}
+
+
+def _measure(code: str) -> tuple[float, float]:
+    """(seconds, peak RSS MiB) of ``python -c code`` in a fresh process."""
+    script = (
+        "import resource, time; t0 = time.perf_counter(); "
+        f"{code}; "
+        "print(time.perf_counter() - t0, "
+        "resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout.split()
+    rss_kib = float(out[1]) / (1024 if sys.platform == "darwin" else 1)
+    return float(out[0]), rss_kib / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("targets", nargs="*", default=list(TARGETS))
+    args = ap.parse_args()
+
+    print(f"{'target':<24} {'import_s':>9} {'peak_rss_MiB':>13}")
+    for name in args.targets:
+        try:
+            runs = [_measure(TARGETS[name]) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<24} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        secs = statistics.median(r[0] for r in runs)
+        rss = statistics.median(r[1] for r in runs)
+        print(f"{name:<24} {secs:>9.3f} {rss:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
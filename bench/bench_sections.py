@@ -0,0 +1,94 @@
+"""
+Compare full‑paper vs. sections‑only ingestion on local PDFs.
+
+For each PDF reports chunks that would be embedded in each mode (using
+PaperQA's default chunk size / overlap), an estimate of embedding tokens
+(~4 chars per token), the characters the legacy per‑page keyword regex
+produced vs. the single‑pass ``SectionMatcher``, and the extraction latency.
+``--scale`` then times the matcher over the corpus repeated 1…N times to
+show scanning stays linear in document size:
+
+    python -m bench.bench_sections sample_paper/*.pdf sample_output/*.pdf --scale 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import re
+import time
+
+from paperqa import Settings
+
+from backend.pipeline.pdf_pages import iter_pages
+from backend.pipeline.sections import SectionMatcher, chunk_text, chunking, extract_relevant_sections
+
+DEFAULT_PDFS = ["sample_paper/*.pdf", "sample_output/*.pdf"]
+
+_LEGACY_RE = re.compile(
+    r"(?:limitations|future work|conclusion|further work|future directions)[\s\S]{0,1000}",
+    re.IGNORECASE,
+)
+
+
+def _legacy_chars(pages: list[str]) -> int:
+    return sum(len("\n\n".join(_LEGACY_RE.findall(p))) for p in pages)
+
+
+def _scan(pages: list[str]) -> float:
+    matcher = SectionMatcher()
+    t0 = time.perf_counter()
+    for page in pages:
+        matcher.feed(page)
+    matcher.finish()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pdfs", nargs="*", default=DEFAULT_PDFS)
+    ap.add_argument("--scale", type=int, default=16, help="max corpus repetition for the scan timing")
+    args = ap.parse_args()
+
+    chunk_size, overlap = chunking(Settings())
+    paths = sorted({p for pattern in args.pdfs for p in glob.glob(pattern)})
+
+    print(
+        f"{'pdf':<32} {'full_chunks':>11} {'sect_chunks':>11} {'full_tok':>9} "
+        f"{'sect_tok':>9} {'legacy_ch':>9} {'sect_ch':>8} {'extract_s':>9}"
+    )
+    corpus: list[str] = []
+    total_full = total_sect = 0
+    for path in paths:
+        pages = list(iter_pages(path))
+        corpus.extend(pages)
+        full = "\n".join(pages)
+        t0 = time.perf_counter()
+        sect = extract_relevant_sections(path)
+        extract_s = time.perf_counter() - t0
+
+        n_full = len(chunk_text(full, chunk_size, overlap))
+        n_sect = len(chunk_text(sect, chunk_size, overlap)) if sect else 0
+        total_full += n_full
+        total_sect += n_sect
+        print(
+            f"{path[-32:]:<32} {n_full:>11} {n_sect:>11} {len(full) // 4:>9} "
+            f"{len(sect) // 4:>9} {_legacy_chars(pages):>9} {len(sect):>8} {extract_s:>9.3f}"
+        )
+
+    if total_full:
+        print(f"\nchunks embedded: {total_sect}/{total_full} ({100 * total_sect / total_full:.0f}%)")
+
+    if corpus:
+        print(f"\n{'repeat':>6} {'chars':>10} {'scan_s':>8} {'MB/s':>7}")
+        k = 1
+        while k <= args.scale:
+            pages = corpus * k
+            secs = _scan(pages)
+            chars = sum(len(p) for p in pages)
+            print(f"{k:>6} {chars:>10} {secs:>8.3f} {chars / secs / 1e6:>7.1f}")
+            k *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Micro‑benchmark of per‑task setup overhead in the Celery workers.
+
+Compares the old pattern (a fresh event loop per task, never closed, plus a
+new ``Settings`` per task) with the persistent per‑thread loop and the shared
+``resources.get_settings()``:
+
+    python -m bench.bench_task_overhead --tasks 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import time
+
+from paperqa import Settings
+
+from backend.pipeline import resources
+
+
+async def _job():
+    await asyncio.sleep(0)
+
+
+def _old_style(n: int) -> float:
+    loops = []
+    t0 = time.perf_counter()
+    for _ in range(n):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        Settings(llm=resources.DEFAULT_LLM)
+        loop.run_until_complete(_job())
+        loops.append(loop)  # the old worker leaked these
+    elapsed = time.perf_counter() - t0
+    for loop in loops:
+        loop.close()
+    return elapsed
+
+
+def _new_style(n: int) -> float:
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    resources.get_settings()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        resources.get_settings()
+        loop.run_until_complete(_job())
+    elapsed = time.perf_counter() - t0
+    loop.close()
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tasks", type=int, default=2000)
+    args = ap.parse_args()
+
+    gc.collect()
+    old = _old_style(args.tasks)
+    gc.collect()
+    new = _new_style(args.tasks)
+    per = lambda t: 1e6 * t / args.tasks  # noqa: E731
+    print(f"fresh loop + Settings per task : {per(old):8.1f} µs/task")
+    print(f"persistent loop + shared Settings: {per(new):8.1f} µs/task")
+    print(f"speed‑up                        : {old / new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Deterministic local stand‑ins for PaperQA.
+
+``FakeDocs`` mimics the parts of the ``Docs`` API the runners use
+(``aadd``, ``aadd_texts``, ``aquery``, ``docs``, ``texts``) and simulates
+embedding / LLM latency with ``asyncio.sleep`` so concurrency can be measured
+without network access or API keys.
+
+``fake_settings`` instead keeps the real ``Docs`` (PDF parsing, chunking,
+retrieval) and only swaps the backends: LiteLLM ``mock_response`` models for
+the answer / summary LLMs and PaperQA's local ``sparse`` hashing embedding.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+EMBED_LATENCY = 0.20  # seconds per document ingested
+LLM_LATENCY = 0.30  # seconds per query
+
+
+@dataclass
+class FakeDoc:
+    docname: str
+    dockey: str
+    citation: str = ""
+
+
+@dataclass
+class FakeText:
+    text: str
+    name: str
+    doc: FakeDoc
+    embedding: list[float] | None = None
+
+
+def fake_embedding(text: str, dim: int = 16) -> list[float]:
+    """Stable pseudo‑embedding derived from a hash of ``text``."""
+    digest = hashlib.sha256(text.encode()).digest()
+    return [b / 255.0 for b in digest[:dim]]
+
+
+@dataclass
+class FakeAnswer:
+    formatted_answer: str
+
+    def __str__(self) -> str:
+        return self.formatted_answer
+
+
+@dataclass
+class FakeDocs:
+    docs: dict = field(default_factory=dict)
+    texts: list = field(default_factory=list)
+    embed_latency: float = EMBED_LATENCY
+    llm_latency: float = LLM_LATENCY
+
+    async def aadd(self, path: str, settings=None, **kwargs) -> str:
+        await asyncio.sleep(self.embed_latency)
+        name = Path(path).stem
+        doc = FakeDoc(docname=name, dockey=name, citation=f"{name} (fake)")
+        texts = [
+            FakeText(text=f"{name} chunk {i}", name=f"{name} pages {i}-{i}", doc=doc)
+            for i in range(4)
+        ]
+        for t in texts:
+            t.embedding = fake_embedding(t.text)
+        await self.aadd_texts(texts, doc, settings=settings)
+        return name
+
+    async def aadd_texts(self, texts, doc, settings=None, **kwargs) -> bool:
+        if doc.dockey in self.docs:
+            return False
+        self.docs[doc.dockey] = doc
+        self.texts.extend(texts)
+        return True
+
+    async def aquery(self, query: str, settings=None, callbacks=None, **kwargs) -> FakeAnswer:
+        names = sorted(d.docname for d in self.docs.values())
+        answer = f"1. Fake future work for {', '.join(names) or 'no papers'}.\n2. Extend to: {query[:40]}"
+        if callbacks:
+            step = self.llm_latency / max(1, len(answer.split()))
+            for word in answer.split(" "):
+                await asyncio.sleep(step)
+                for cb in callbacks:
+                    cb(word + " ")
+        else:
+            await asyncio.sleep(self.llm_latency)
+        return FakeAnswer(answer)
+
+
+FAKE_ANSWER = (
+    "1. Evaluate the method on larger, more diverse datasets.\n"
+    "2. Study robustness to noisy or missing inputs.\n"
+    "3. Release code and benchmarks to support reproducibility."
+)
+FAKE_SUMMARY = json.dumps(
+    {"summary": "The authors list future work and limitations.", "relevance_score": 8}
+)
+
+
+def _mock_llm_config(name: str, response: str) -> dict:
+    return {
+        "model_list": [
+            {
+                "model_name": name,
+                "litellm_params": {"model": "gpt-4o-mini", "mock_response": response},
+            }
+        ]
+    }
+
+
+def fake_settings(llm: str = "fake-llm"):
+    """PaperQA ``Settings`` whose LLMs and embeddings never leave the process."""
+    from paperqa import Settings
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-bench")
+    return Settings(
+        llm=llm,
+        llm_config=_mock_llm_config(llm, FAKE_ANSWER),
+        summary_llm=f"{llm}-summary",
+        summary_llm_config=_mock_llm_config(f"{llm}-summary", FAKE_SUMMARY),
+        embedding="sparse",
+        parsing={"use_doc_details": False},
+    )
@@ -0,0 +1,175 @@
+"""
+Local stand‑in for the arXiv export API and PDF host.
+
+``StubArxiv`` serves a fixed set of local PDFs as arXiv papers:
+
+• ``GET /api/query?...&start=&max_results=`` – an Atom feed in the format the
+  ``arxiv`` client parses (paged, with ``opensearch:totalResults``),
+• ``GET /pdf/<id>.pdf`` – the PDF bytes for an entry's ID.
+
+Every query returns the same papers, newest first, except that a
+``submittedDate:[YYYYMMDDHHMM TO YYYYMMDDHHMM]`` clause is honoured like the
+real API does. ``entries`` / ``years`` spread more entries than PDFs over a
+range of years, e.g. to count the pages a date‑filtered search needs.
+``faults`` maps an arXiv ID to what its next PDF requests get instead of the
+file, one item per request: an HTTP status, or ``"truncate"`` for a body cut
+off halfway. The server only exists to make searches and downloads go over
+real HTTP without touching the network:
+
+    with StubArxiv(["sample_paper/ART20203995.pdf"]) as stub:
+        os.environ["ARXIV_PDF_BASE"] = stub.pdf_base
+        os.environ["ARXIV_API_URL"] = stub.api_url
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"
+      xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/"
+      xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <id>http://arxiv.org/api/stub</id>
+  <title>arXiv stub query</title>
+  <updated>2024-01-01T00:00:00Z</updated>
+  <opensearch:totalResults>{total}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{count}</opensearch:itemsPerPage>
+{entries}
+</feed>
+"""
+
+_ENTRY = """  <entry>
+    <id>http://arxiv.org/abs/{arxiv_id}</id>
+    <updated>{published}T00:00:00Z</updated>
+    <published>{published}T00:00:00Z</published>
+    <title>{title}</title>
+    <summary>{summary}</summary>
+    <author><name>Stub Author {i}</name></author>
+    <link href="http://arxiv.org/abs/{arxiv_id}" rel="alternate" type="text/html"/>
+    <link title="pdf" href="{pdf_base}/{arxiv_id}.pdf" rel="related" type="application/pdf"/>
+    <arxiv:primary_category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>"""
+
+_DATE_RE = re.compile(r"submittedDate:\[(\d{8})\d{4} TO (\d{8})\d{4}\]")
+
+
+class StubArxiv:
+    """Threaded HTTP server on ``127.0.0.1`` serving ``pdfs`` as arXiv entries."""
+
+    def __init__(
+        self,
+        pdfs: list[str | Path],
+        port: int = 0,
+        *,
+        entries: int | None = None,
+        years: tuple[int, ...] = (2024,),
+        faults: dict[str, list[int | str]] | None = None,
+    ):
+        n = entries or len(pdfs)
+        newest_first = sorted(years, reverse=True)
+        per_year = -(-n // len(newest_first))
+        self.papers: dict[str, Path] = {}
+        self.dates: dict[str, date] = {}
+        for i in range(n):
+            arxiv_id = f"2401.{i + 1:05d}v1"
+            self.papers[arxiv_id] = Path(pdfs[i % len(pdfs)])
+            year_end = date(newest_first[i // per_year], 12, 31)
+            self.dates[arxiv_id] = year_end - timedelta(days=(i % per_year) * 364 // per_year)
+        self.faults = {k: list(v) for k, v in (faults or {}).items()}
+        self.requests = {"query": 0, "pdf": 0}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def pdf_base(self) -> str:
+        return f"{self.base}/pdf"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base}/api/query"
+
+    def feed(self, start: int, max_results: int, search_query: str = "") -> str:
+        ids = list(self.papers)
+        if m := _DATE_RE.search(search_query):
+            lo, hi = (date(int(d[:4]), int(d[4:6]), int(d[6:])) for d in m.groups())
+            ids = [i for i in ids if lo <= self.dates[i] <= hi]
+        page = ids[start : start + max_results]
+        entries = "\n".join(
+            _ENTRY.format(
+                arxiv_id=arxiv_id,
+                i=start + k,
+                published=self.dates[arxiv_id].isoformat(),
+                title=escape(self.papers[arxiv_id].stem.replace("_", " ")),
+                summary=escape(f"Stub abstract for {self.papers[arxiv_id].name}."),
+                pdf_base=self.pdf_base,
+            )
+            for k, arxiv_id in enumerate(page)
+        )
+        return _FEED.format(total=len(ids), start=start, count=len(page), entries=entries)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/api/query":
+                    stub.requests["query"] += 1
+                    qs = parse_qs(url.query)
+                    start = int(qs.get("start", ["0"])[0])
+                    max_results = int(qs.get("max_results", ["10"])[0])
+                    search_query = qs.get("search_query", [""])[0]
+                    body = stub.feed(start, max_results, search_query).encode()
+                    self._send(body, "application/atom+xml")
+                elif url.path.startswith("/pdf/"):
+                    stub.requests["pdf"] += 1
+                    arxiv_id = url.path[len("/pdf/"):].removesuffix(".pdf")
+                    path = stub.papers.get(arxiv_id)
+                    if path is None:
+                        self.send_error(404)
+                        return
+                    fault = pending.pop(0) if (pending := stub.faults.get(arxiv_id)) else None
+                    if isinstance(fault, int):
+                        self.send_error(fault)
+                    elif fault == "truncate":
+                        body = path.read_bytes()
+                        self._send(body, "application/pdf", cut=len(body) // 2)
+                    else:
+                        self._send(path.read_bytes(), "application/pdf")
+                else:
+                    self.send_error(404)
+
+            def _send(self, body: bytes, content_type: str, cut: int | None = None):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body[:cut])
+                if cut is not None:
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "StubArxiv":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,14 +1,66 @@
 from __future__ import annotations
 
+import os
 import re
+import time
 import difflib
+import functools
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional, Set, Tuple
+from itertools import islice
+from typing import Iterator, List, Optional, Set, Tuple
 
-import spacy
 import arxiv
 
-_nlp = spacy.load("en_core_web_sm", disable=["ner"])
+# spaCy model used for noun phrases; "fallback" skips spaCy entirely.
+NLP_MODEL = os.getenv("OPTIMIZE_ARXIV_NLP", "en_core_web_sm")
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "3600"))
+
+# arXiv export API endpoint; point at a local Atom feed server for testing.
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "https://export.arxiv.org/api/query")
+ARXIV_MAX_PAGE = 100
+# Local metadata index (see arxiv_index.py); searched before the live API when set.
+ARXIV_INDEX_PATH = os.getenv("ARXIV_INDEX_PATH", "")
+
+_STOPWORDS = frozenset(
+    """a an the and or but of for in on at to from by with about into over under
+    between among is are was were be been being do does did have has had i me my
+    we our you your it its this that these those what which who whom how why when
+    where show find give get want need looking look papers paper research recent
+    some any all most more other such than then there their them they not no
+    please sort sorted after before since""".split()
+)
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9\-']*|[^\sa-z0-9]")
+
+
+@functools.lru_cache(maxsize=1)
+def get_nlp():
+    """Load the spaCy pipeline on first use; None if disabled or unavailable."""
+    if NLP_MODEL == "fallback":
+        return None
+    try:
+        import spacy
+        return spacy.load(NLP_MODEL, disable=["ner"])
+    except (ImportError, OSError):
+        return None
+
+
+def _fallback_noun_phrases(text: str) -> Set[str]:
+    """Cheap noun‑phrase approximation: runs of 1‑4 consecutive content words."""
+    phrases: Set[str] = set()
+    run: List[str] = []
+    for tok in _WORD_RE.findall(text.lower()) + ["."]:
+        if tok[0].isalnum() and tok not in _STOPWORDS and not tok.isdigit():
+            run.append(tok)
+            continue
+        if run:
+            phrases.add(" ".join(run[-4:]))
+            run = []
+    return phrases
 
 #update for potentially better results, not sure if it works as well as it could though
 #some qualms remaining
@@ -43,15 +95,20 @@ SORT_MAP = {
     "updated": arxiv.SortCriterion.LastUpdatedDate,
 }
 
-def _noun_phrases(text: str) -> Set[str]:
-    """Return lowercase noun phrases of length 1‑4 tokens."""
-    doc = _nlp(text.lower())
+def _phrases_from_doc(doc) -> Set[str]:
     return {
         " ".join(tok.text for tok in chunk).strip()
         for chunk in doc.noun_chunks
         if 1 <= len(chunk) <= 4
     }
 
+def _noun_phrases(text: str) -> Set[str]:
+    """Return lowercase noun phrases of length 1‑4 tokens."""
+    nlp = get_nlp()
+    if nlp is None:
+        return _fallback_noun_phrases(text)
+    return _phrases_from_doc(nlp(text.lower()))
+
 def _expand_synonyms(phrases: Set[str]) -> Set[str]:
     """Add known synonyms so they participate in the search."""
     expanded = set(phrases)
@@ -116,6 +173,14 @@ def _category_from_phrase(phrase: str) -> Optional[str]:
         return CATEGORY_MAP[candidates[0]]
     return None
 
+def _date_clause(min_year: Optional[int], max_year: Optional[int]) -> str:
+    """arXiv ``submittedDate`` range for the year window ('' if unbounded)."""
+    if not (min_year or max_year):
+        return ""
+    lo = f"{min_year or 1991}01010000"
+    hi = f"{max_year or 9999}12312359"
+    return f"submittedDate:[{lo} TO {hi}]"
+
 def _detect_sort(text: str) -> arxiv.SortCriterion:
     """Detect desired sorting."""
     for key, crit in SORT_MAP.items():
@@ -125,16 +190,15 @@ def _detect_sort(text: str) -> arxiv.SortCriterion:
     return arxiv.SortCriterion.SubmittedDate
 
 
-def optimize_query(user_text: str):
-    """Transform user text into query + filter dict for arXiv search."""
-    phrases = _expand_synonyms(_noun_phrases(user_text))
+def _build_query(user_text: str, noun_phrases: Set[str]):
+    phrases = sorted(_expand_synonyms(noun_phrases))
 
     keyword_parts = [f'(ti:"{p}" OR abs:"{p}")' for p in phrases]
 
     categories = {_category_from_phrase(p) for p in phrases}
     categories.discard(None)
     if categories:
-        cat_clause = " OR ".join(f"cat:{c}" for c in categories)
+        cat_clause = " OR ".join(f"cat:{c}" for c in sorted(categories))
         keyword_parts.append(f'({cat_clause})')
 
     authors = _parse_author_filters(user_text)
@@ -145,9 +209,12 @@ def optimize_query(user_text: str):
     for ex in _extract_exclusions(user_text):
         keyword_parts.append(f'NOT (ti:"{ex}" OR abs:"{ex}")')
 
-    query = " AND ".join(keyword_parts) if keyword_parts else ""
-
+    # Filter by date on the server so every returned paper qualifies.
     min_year, max_year = _parse_date_filters(user_text)
+    if date_clause := _date_clause(min_year, max_year):
+        keyword_parts.append(date_clause)
+
+    query = " AND ".join(keyword_parts) if keyword_parts else ""
 
     sort_by = _detect_sort(user_text)
 
@@ -159,33 +226,127 @@ def optimize_query(user_text: str):
     }
     return query, filters
 
-def search_arxiv(query: str, filters: dict):
-    """Run search and return structured results list."""
-    max_results = filters.get("max_results", 10)
-    sort_by = filters.get("sort", arxiv.SortCriterion.SubmittedDate)
+# prompt → (query, filters); bounded LRU so repeated prompts skip the parse.
+# Both caches are shared by batch search threads, hence the locks.
+_plan_cache: "OrderedDict[str, Tuple[str, dict]]" = OrderedDict()
+_plan_lock = threading.Lock()
+
+def _plan_get(user_text: str):
+    with _plan_lock:
+        plan = _plan_cache.get(user_text)
+        if plan is not None:
+            _plan_cache.move_to_end(user_text)
+        return plan
+
+def _plan_put(user_text: str, plan) -> None:
+    with _plan_lock:
+        _plan_cache[user_text] = plan
+        _plan_cache.move_to_end(user_text)
+        while len(_plan_cache) > QUERY_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
 
-    search = arxiv.Search(
-        query=query or "all:", 
-        max_results=max_results,
-        sort_by=sort_by,
-    )
+def optimize_query(user_text: str):
+    """Transform user text into query + filter dict for arXiv search."""
+    plan = _plan_get(user_text)
+    if plan is None:
+        plan = _build_query(user_text, _noun_phrases(user_text))
+        _plan_put(user_text, plan)
+    query, filters = plan
+    return query, dict(filters)
+
+def optimize_queries(user_texts: List[str]):
+    """
+    Batch ``optimize_query``: uncached prompts are parsed together through
+    ``nlp.pipe``. Returns (query, filters) pairs in input order.
+    """
+    misses = [t for t in dict.fromkeys(user_texts) if _plan_get(t) is None]
+    if misses:
+        nlp = get_nlp()
+        if nlp is None:
+            phrase_sets = [_fallback_noun_phrases(t) for t in misses]
+        else:
+            docs = nlp.pipe((t.lower() for t in misses), batch_size=64)
+            phrase_sets = [_phrases_from_doc(doc) for doc in docs]
+        for text, phrases in zip(misses, phrase_sets):
+            _plan_put(text, _build_query(text, phrases))
+    return [optimize_query(t) for t in user_texts]
+
+# (query, filters) → (expires_at, results)
+_search_cache: "OrderedDict[tuple, Tuple[float, list]]" = OrderedDict()
+_search_lock = threading.Lock()
 
-    results = []
-    for result in search.results():
+def search_arxiv(query: str, filters: dict):
+    """
+    Run search and return structured results list (cached for
+    ``SEARCH_CACHE_TTL`` s). With ``ARXIV_INDEX_PATH`` set the local index
+    answers first; the live API is only asked when it finds nothing.
+    """
+    key = (
+        query,
+        filters.get("max_results", 10),
+        filters.get("sort", arxiv.SortCriterion.SubmittedDate),
+        filters.get("min_year"),
+        filters.get("max_year"),
+    )
+    with _search_lock:
+        hit = _search_cache.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            _search_cache.move_to_end(key)
+            return [dict(r) for r in hit[1]]
+
+    # the search itself runs unlocked so batch threads overlap
+    results = _search_arxiv_local(query, filters) or _search_arxiv_live(query, filters)
+    with _search_lock:
+        _search_cache[key] = (time.monotonic() + SEARCH_CACHE_TTL, results)
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+    return [dict(r) for r in results]
+
+def _client(page_size: int) -> arxiv.Client:
+    client = arxiv.Client(page_size=page_size)
+    client.query_url_format = ARXIV_API_URL + "?{}"
+    return client
+
+def iter_arxiv(query: str, filters: dict, page_size: Optional[int] = None) -> Iterator[dict]:
+    """
+    Lazily yield qualifying results page by page. A page is only fetched
+    when the previous one has been consumed, so ``islice(..., n)`` stops
+    after the fewest requests that produce ``n`` papers.
+    """
+    sort_by = filters.get("sort", arxiv.SortCriterion.SubmittedDate)
+    page_size = page_size or min(max(filters.get("max_results", 10), 1), ARXIV_MAX_PAGE)
+    search = arxiv.Search(query=query or "all:", max_results=None, sort_by=sort_by)
+    min_y = filters.get("min_year")
+    max_y = filters.get("max_year")
+
+    for result in _client(page_size).results(search):
+        # submittedDate already filters server side; this guards against
+        # queries planned without it and v1‑vs‑published date skew.
         pub_year = result.published.year
-        min_y = filters.get("min_year")
-        max_y = filters.get("max_year")
         if min_y and pub_year < min_y:
             continue
         if max_y and pub_year > max_y:
             continue
-        results.append({
+        yield {
             "title": result.title,
             "authors": ", ".join(str(a) for a in result.authors),
             "published": result.published.date(),
-            "url": result.entry_id
-        })
-    return results
+            "url": result.entry_id,
+            "summary": result.summary,
+        }
+
+def _search_arxiv_live(query: str, filters: dict):
+    return list(islice(iter_arxiv(query, filters), filters.get("max_results", 10)))
+
+def _search_arxiv_local(query: str, filters: dict) -> Optional[list]:
+    """Results from the local index; None if it's unset, empty or can't run ``query``."""
+    if not ARXIV_INDEX_PATH:
+        return None
+    from arxiv_index import get_index
+
+    index = get_index()
+    return index.search(query, filters) if index is not None else None
 
 if __name__ == "__main__":
     user_q = input("Ask a research question: ")
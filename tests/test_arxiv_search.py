@@ -0,0 +1,96 @@
+"""
+arXiv query planning and search against the local Atom feed stub: the
+``submittedDate`` clause, lazy paging and the search cache.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from itertools import islice
+
+import pytest
+
+os.environ.setdefault("OPTIMIZE_ARXIV_NLP", "fallback")
+
+import optimize_arxiv
+from bench.stub_arxiv import StubArxiv
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    """30 entries, ten per year 2022–2024 (newest first), behind the live search path."""
+    pdf = tmp_path / "paper.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n")
+    client = optimize_arxiv._client
+
+    def _no_delay(page_size: int):
+        c = client(page_size)
+        c.delay_seconds = 0  # arXiv's politeness delay, pointless against the stub
+        return c
+
+    monkeypatch.setattr(optimize_arxiv, "_client", _no_delay)
+    monkeypatch.setattr(optimize_arxiv, "ARXIV_INDEX_PATH", "")
+    monkeypatch.setattr(optimize_arxiv, "_search_cache", OrderedDict())
+    with StubArxiv([pdf], entries=30, years=(2022, 2023, 2024)) as server:
+        monkeypatch.setattr(optimize_arxiv, "ARXIV_API_URL", server.api_url)
+        yield server
+
+
+@pytest.mark.parametrize(
+    "min_year, max_year, clause",
+    [
+        (None, None, ""),
+        (2019, 2020, "submittedDate:[201901010000 TO 202012312359]"),
+        (2023, 2023, "submittedDate:[202301010000 TO 202312312359]"),
+        (2023, None, "submittedDate:[202301010000 TO 999912312359]"),
+        (None, 2015, "submittedDate:[199101010000 TO 201512312359]"),
+    ],
+)
+def test_date_clause_covers_whole_years(min_year, max_year, clause):
+    assert optimize_arxiv._date_clause(min_year, max_year) == clause
+
+
+def test_year_range_in_prompt_becomes_a_date_clause():
+    query, filters = optimize_arxiv.optimize_query("graph neural network papers from 2019 to 2020")
+    assert query.endswith(" AND submittedDate:[201901010000 TO 202012312359]")
+    assert (filters["min_year"], filters["max_year"]) == (2019, 2020)
+
+    query, filters = optimize_arxiv.optimize_query("graph neural network papers")
+    assert "submittedDate" not in query
+    assert (filters["min_year"], filters["max_year"]) == (None, None)
+
+
+def test_iter_arxiv_fetches_pages_only_as_consumed(stub):
+    results = optimize_arxiv.iter_arxiv("all:x", {}, page_size=10)
+    assert stub.requests["query"] == 0
+
+    assert len(list(islice(results, 15))) == 15
+    assert stub.requests["query"] == 2
+
+
+def test_date_filter_is_applied_by_the_server(stub):
+    query = "all:x AND " + optimize_arxiv._date_clause(2023, 2023)
+    papers = list(
+        optimize_arxiv.iter_arxiv(query, {"min_year": 2023, "max_year": 2023}, page_size=4)
+    )
+
+    assert len(papers) == 10
+    assert {p["published"].year for p in papers} == {2023}
+    # 10 matches in pages of 4: no page is spent on the 20 entries outside 2023
+    assert stub.requests["query"] == 3
+
+
+def test_search_arxiv_returns_max_results_and_caches(stub):
+    filters = {"min_year": 2024, "max_year": 2024, "max_results": 5}
+    query = "all:x AND " + optimize_arxiv._date_clause(2024, 2024)
+
+    first = optimize_arxiv.search_arxiv(query, filters)
+    assert len(first) == 5
+    assert all(p["summary"] for p in first)
+    assert stub.requests["query"] == 1
+
+    first[0]["title"] = "changed by the caller"
+    second = optimize_arxiv.search_arxiv(query, filters)
+    assert stub.requests["query"] == 1
+    assert second[0]["title"] != "changed by the caller"
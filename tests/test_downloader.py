@@ -0,0 +1,112 @@
+"""
+``backend.pipeline.downloader`` against the local arXiv stub: retries with
+exponential backoff, no retries for client errors, and no partial files
+left behind when a download fails.
+"""
+
+from __future__ import annotations
+
+import types
+
+import pytest
+import requests
+
+from backend.pipeline import downloader
+from bench.stub_arxiv import StubArxiv
+
+PAPER = "2401.00001v1"
+URL = f"http://arxiv.org/abs/{PAPER}"
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(b"%PDF-1.4\n" + bytes(range(256)) * 512)
+    return path
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays the downloader asked for, without actually sleeping."""
+    delays: list[float] = []
+    monkeypatch.setattr(downloader, "time", types.SimpleNamespace(sleep=delays.append))
+    return delays
+
+
+def _download(stub: StubArxiv, dest, **kwargs) -> str:
+    return downloader.download_pdf(
+        URL, dest, base_url=stub.pdf_base, backoff=0.5, session=requests.Session(), **kwargs
+    )
+
+
+def test_retries_transient_errors_with_exponential_backoff(pdf, tmp_path, sleeps):
+    with StubArxiv([pdf], faults={PAPER: [503, 429, 502]}) as stub:
+        path = _download(stub, tmp_path / "out", retries=3)
+
+    assert stub.requests["pdf"] == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+    assert open(path, "rb").read() == pdf.read_bytes()
+
+
+def test_gives_up_after_the_last_retry(pdf, tmp_path, sleeps):
+    with StubArxiv([pdf], faults={PAPER: [503, 503, 503]}) as stub:
+        with pytest.raises(requests.HTTPError):
+            _download(stub, tmp_path / "out", retries=2)
+
+    assert stub.requests["pdf"] == 3
+    assert sleeps == [0.5, 1.0]
+    assert list((tmp_path / "out").iterdir()) == []
+
+
+def test_client_errors_are_not_retried(pdf, tmp_path, sleeps):
+    with StubArxiv([pdf], faults={PAPER: [404]}) as stub:
+        with pytest.raises(requests.HTTPError):
+            _download(stub, tmp_path / "out", retries=3)
+
+    assert stub.requests["pdf"] == 1
+    assert sleeps == []
+
+
+def test_truncated_body_leaves_no_file_behind(pdf, tmp_path, sleeps):
+    with StubArxiv([pdf], faults={PAPER: ["truncate"]}) as stub:
+        with pytest.raises(requests.RequestException):
+            _download(stub, tmp_path / "out", retries=0)
+
+    # neither a truncated PDF a later job would treat as cached, nor a .part file
+    assert list((tmp_path / "out").iterdir()) == []
+
+
+def test_truncated_body_is_retried(pdf, tmp_path, sleeps):
+    with StubArxiv([pdf], faults={PAPER: ["truncate"]}) as stub:
+        path = _download(stub, tmp_path / "out", retries=1)
+
+    assert stub.requests["pdf"] == 2
+    assert sleeps == [0.5]
+    assert open(path, "rb").read() == pdf.read_bytes()
+    assert [p.name for p in (tmp_path / "out").iterdir()] == [f"{PAPER}.pdf"]
+
+
+def test_downloaded_paper_is_reused(pdf, tmp_path, sleeps):
+    with StubArxiv([pdf]) as stub:
+        first = _download(stub, tmp_path / "out")
+        second = _download(stub, tmp_path / "out")
+
+    assert first == second
+    assert stub.requests["pdf"] == 1
+
+
+def test_download_pdfs_keeps_input_order(pdf, tmp_path, sleeps):
+    done: list[tuple[int, int]] = []
+    with StubArxiv([pdf], entries=5) as stub:
+        urls = [f"http://arxiv.org/abs/2401.{i:05d}v1" for i in (3, 1, 5, 2, 4)]
+        paths = downloader.download_pdfs(
+            urls,
+            tmp_path / "out",
+            max_workers=3,
+            on_done=lambda finished, total: done.append((finished, total)),
+            base_url=stub.pdf_base,
+            session=requests.Session(),
+        )
+
+    assert [p.rsplit("/", 1)[1] for p in paths] == [u.rsplit("/", 1)[1] + ".pdf" for u in urls]
+    assert sorted(done) == [(i, 5) for i in range(1, 6)]
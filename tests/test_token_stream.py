@@ -0,0 +1,98 @@
+"""
+Answer tokens streamed through the job pipeline, with ``bench.fakes.FakeDocs``
+standing in for PaperQA: the chunks add up to the answer, a cached answer
+arrives as one chunk, and a job's token stream always ends with ``end``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+
+import pytest
+
+pytest.importorskip("paperqa")
+pytest.importorskip("celery")
+pytest.importorskip("redis")
+
+from backend.pipeline import answer_cache, index_cache, limitation_runner
+from backend.workers import tasks
+from bench.fakes import FakeDocs
+
+QUESTION = limitation_runner.QUESTION
+
+
+@pytest.fixture
+def pdf(tmp_path, monkeypatch):
+    """One paper behind fresh caches, ingested and answered by ``FakeDocs``."""
+    docs = functools.partial(FakeDocs, embed_latency=0, llm_latency=0.01)
+    monkeypatch.setattr(limitation_runner, "Docs", docs)
+    monkeypatch.setattr(index_cache, "Docs", docs)
+    monkeypatch.setattr(index_cache, "_cache", index_cache.IndexCache(tmp_path / "index"))
+    monkeypatch.setattr(answer_cache, "_cache", answer_cache.AnswerCache(tmp_path / "answers"))
+    path = tmp_path / "2401.00001v1.pdf"
+    path.write_bytes(b"%PDF-1.4\n")
+    return str(path)
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Token stream entries a task publishes, with Redis and job bookkeeping stubbed out."""
+    entries: list[dict] = []
+    monkeypatch.setattr(tasks, "_publish_token", lambda job_id, **entry: entries.append(entry))
+    for name in ("_mark_status", "_mark_running", "_finish", "release_flight", "_flush_metrics"):
+        monkeypatch.setattr(tasks, name, lambda *args, **kwargs: None)
+    return entries
+
+
+def _analyze(pdf: str, chunks: list[tuple[str, str]]):
+    return limitation_runner._analyze(
+        [pdf], [QUESTION], on_token=lambda q, chunk: chunks.append((q, chunk))
+    )
+
+
+def test_streamed_chunks_add_up_to_the_answer(pdf):
+    chunks: list[tuple[str, str]] = []
+    answers, _, cached = asyncio.run(_analyze(pdf, chunks))
+
+    assert not cached
+    assert len(chunks) > 1
+    assert {q for q, _ in chunks} == {QUESTION}
+    assert "".join(c for _, c in chunks).strip() == answers[QUESTION]
+
+
+def test_cached_answer_arrives_as_one_chunk(pdf):
+    answers, _, _ = asyncio.run(_analyze(pdf, []))
+
+    chunks: list[tuple[str, str]] = []
+    again, _, cached = asyncio.run(_analyze(pdf, chunks))
+
+    assert cached
+    assert again == answers
+    assert chunks == [(QUESTION, answers[QUESTION])]
+
+
+def test_job_token_stream_ends_with_end(pdf, published, monkeypatch):
+    async def run(prompt, *, on_token, **kwargs):
+        answers, _, _ = await limitation_runner._analyze([pdf], [QUESTION], on_token=on_token)
+        return {"answers": answers}
+
+    monkeypatch.setattr(limitation_runner, "run", run)
+    result = tasks.run_limitation("job-1", "graph neural networks")
+
+    assert published[-1] == {"event": "end"}
+    tokens = published[:-1]
+    assert tokens and all(e["field"] == QUESTION for e in tokens)
+    assert "".join(e["token"] for e in tokens).strip() == result["answers"][QUESTION]
+
+
+def test_failed_job_still_ends_its_token_stream(published, monkeypatch):
+    async def run(prompt, *, on_token, **kwargs):
+        on_token(QUESTION, "partial ")
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(limitation_runner, "run", run)
+    with pytest.raises(RuntimeError):
+        tasks.run_limitation("job-2", "graph neural networks")
+
+    assert published == [{"field": QUESTION, "token": "partial "}, {"event": "end"}]
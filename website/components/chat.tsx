@@ -18,6 +18,10 @@ export default function Chat() {
   const [project, setProject] = useState<string>();
   const [code, setCode] = useState<string>();
   const [chosenPdf, setChosenPdf] = useState<string>();
+  const [sessionId, setSessionId] = useState<string>();
+  const [pipelineJobId, setPipelineJobId] = useState<string>();
+  const [progress, setProgress] = useState<string>();
+  const [partial, setPartial] = useState("");
 
 
   const poll = (id: string, onDone: (r: any) => void) => {
@@ -37,11 +41,53 @@ export default function Chat() {
   };
 
 
+  // Show the answer as the LLM writes it.
+  const streamTokens = (id: string) => {
+    setPartial("");
+    const es = new EventSource(
+      `${process.env.NEXT_PUBLIC_API_BASE}/jobs/${id}/tokens`
+    );
+    es.onmessage = (ev) => {
+      const { token } = JSON.parse(ev.data);
+      setPartial((p) => p + token);
+    };
+    es.addEventListener("end", () => es.close());
+    es.onerror = () => es.close();
+  };
+
+
+  // Push updates over SSE; fall back to polling if the stream can't be opened.
+  const watch = (id: string, onDone: (r: any) => void) => {
+    if (typeof EventSource === "undefined") return poll(id, onDone);
+    streamTokens(id);
+    const es = new EventSource(
+      `${process.env.NEXT_PUBLIC_API_BASE}/jobs/${id}/events`
+    );
+    es.onmessage = (ev) => {
+      const j = JSON.parse(ev.data);
+      setProgress(j.stage ?? undefined);
+      if (j.status === "DONE") {
+        es.close();
+        onDone(j.result);
+      } else if (j.status === "ERROR") {
+        es.close();
+        alert(j.error);
+        setStage("idle");
+      }
+    };
+    es.onerror = () => {
+      es.close();
+      poll(id, onDone);
+    };
+  };
+
+
   const startPipeline = async () => {
     if (!prompt.trim()) return;
     setStage("waiting-papers");
     const r = await post<{ job_id: string }>("/jobs/pipeline", { prompt });
-    poll(r.job_id, (res) => {
+    setPipelineJobId(r.job_id);
+    watch(r.job_id, (res) => {
       setPdfs(res.pdf_paths);
       setStage("pick-pdf");
     });
@@ -52,26 +98,25 @@ export default function Chat() {
     setChosenPdf(pdf);
     setStage("waiting-ideas");
     const r = await post<{ job_id: string }>("/jobs/future", {
-      pipeline_json: "pipeline_output.json",
+      limitation_job_id: pipelineJobId,
       pdf_path: pdf,
     });
-    poll(r.job_id, (res) => {
+    watch(r.job_id, (res) => {
       setIdeas(res.ideas);
+      setSessionId(res.session_id);
       setStage("pick-idea");
     });
   };
 
 
   const pickIdea = async (choice: string) => {
-    if (!chosenPdf) return;
+    if (!sessionId) return;
     setStage("waiting-project");
-    const r = await post<{ job_id: string }>("/jobs/future", {
-      pipeline_json: "pipeline_output.json",
-      pdf_path: chosenPdf,
-      choice,
-      generate_code: true,
-    });
-    poll(r.job_id, (res) => {
+    const r = await post<{ job_id: string }>(
+      `/sessions/${sessionId}/continue`,
+      { choice, generate_code: true }
+    );
+    watch(r.job_id, (res) => {
       setProject(res.project);
       setCode(res.code);
       setStage("done");
@@ -95,17 +140,21 @@ export default function Chat() {
         </div>
       )}
 
-      {stage === "waiting-papers" && <p>🔄 Finding papers…</p>}
+      {stage === "waiting-papers" && <p>🔄 Finding papers… {progress}</p>}
 
       {stage === "pick-pdf" && <PdfCard paths={pdfs} onSelect={pickPdf} />}
 
-      {stage === "waiting-ideas" && <p>🔄 Extracting ideas…</p>}
+      {stage === "waiting-ideas" && <p>🔄 Extracting ideas… {progress}</p>}
+
+      {stage.startsWith("waiting") && partial && (
+        <pre className="whitespace-pre-wrap text-sm opacity-70">{partial}</pre>
+      )}
 
       {stage === "pick-idea" && ideas && (
         <IdeasList text={ideas} onSelect={pickIdea} />
       )}
 
-      {stage === "waiting-project" && <p>🔄 Drafting project…</p>}
+      {stage === "waiting-project" && <p>🔄 Drafting project… {progress}</p>}
 
       {stage === "done" && (
         <>
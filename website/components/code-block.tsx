@@ -9,8 +9,8 @@ export default function CodeBlock({ code }: { code: string }) {
         {code}
       </SyntaxHighlighter>
       <a
-        href="starter_project.py"
-        download
+        href={`data:text/x-python;charset=utf-8,${encodeURIComponent(code)}`}
+        download="starter_project.py"
         className="text-blue-600 underline mt-2 inline-block"
       >
         Download starter_project.py
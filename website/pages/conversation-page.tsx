@@ -20,6 +20,7 @@ export default function ConversationPage() {
   const [ideas, setIdeas] = useState<string>("")
   const [selectedPdf, setSelectedPdf] = useState<string | null>(null)
   const chosenPdfRef = useRef<string>("")
+  const pipelineJobRef = useRef<string>("")
   const bottomRef = useRef<HTMLDivElement>(null)
 
   const poll = (id: string, onDone: (r: any) => void) => {
@@ -47,6 +48,7 @@ export default function ConversationPage() {
     const { job_id } = await post<{ job_id: string }>("/jobs/pipeline", {
       prompt: userMsg.content,
     })
+    pipelineJobRef.current = job_id
     poll(job_id, (res) => {
       setPdfs(res.pdf_paths)
       setMessages((m) => [
@@ -62,7 +64,7 @@ export default function ConversationPage() {
     setSelectedPdf(path) 
     setStage("waitIdeas")
     const { job_id } = await post<{ job_id: string }>("/jobs/future", {
-      pipeline_json: "pipeline_output.json",
+      limitation_job_id: pipelineJobRef.current,
       pdf_path: path,
     })
     poll(job_id, (res) => {
@@ -74,7 +76,7 @@ export default function ConversationPage() {
   const pickIdea = async (num: string) => {
     setStage("waitProj")
     const { job_id } = await post<{ job_id: string }>("/jobs/future", {
-      pipeline_json: "pipeline_output.json",
+      limitation_job_id: pipelineJobRef.current,
       pdf_path: chosenPdfRef.current,
       choice: num,
       generate_code: true,